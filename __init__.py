@@ -0,0 +1,60 @@
+from importlib import import_module
+
+# NOTE: Names are resolved on first access so that `import graphix` stays
+# cheap and the plotting modules (and matplotlib) are only imported when a
+# plotting function is actually used.
+_lazy_attributes = {
+    "Node": "base_types",
+    "AggregatorNode": "base_types",
+    "Stat": "base_types",
+    "Scalar": "stats",
+    "Distribution": "stats",
+    "TimeSeries": "timeseries",
+    "compile_time_series": "timeseries",
+    "SummationAggregator": "aggregators",
+    "ArithmeticMeanAggregator": "aggregators",
+    "GeometricMeanAggregator": "aggregators",
+    "MinAggregator": "aggregators",
+    "MaxAggregator": "aggregators",
+    "CombineAggregator": "aggregators",
+    "Bootstrap": "bootstrap",
+    "compile_json_stats": "json_interface",
+    "create_graph_format": "json_interface",
+    "Run": "run",
+    "RunRegistry": "registry",
+    "open_stats_file": "loaders",
+    "load_json_stats": "loaders",
+    "load_many_json_stats": "loaders",
+    "StatWarehouse": "warehouse",
+    "write_columnar": "columnar",
+    "ColumnarRuns": "columnar",
+    "to_pandas": "tables",
+    "to_arrow": "tables",
+    "from_pandas": "tables",
+    "from_arrow": "tables",
+    "plot_bar": "barplot",
+    "BarLayout": "barplot",
+    "LiveBarPlot": "barplot",
+    "plot_histogram": "distplot",
+    "plot_cdf": "distplot",
+    "plot_heatmap": "distplot",
+    "plot_line": "lineplot",
+    "FigureSpec": "batch_render",
+    "render_figures": "batch_render",
+}
+
+__all__ = list(_lazy_attributes.keys())
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(
+        import_module(f".{_lazy_attributes[name]}", __name__), name
+    )
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -1,17 +1,69 @@
-from math import ceil
+from math import ceil, exp, log
 from statistics import geometric_mean, mean
+from typing import TYPE_CHECKING, Any, Callable, Optional
 from warnings import warn
 
 from .base_types import AggregatorNode
 from .compare_util import BiggestThing, SmallestThing
+from .sparse import SparseValue
 from .stats import Distribution, Scalar
 
+if TYPE_CHECKING:
+    from .bootstrap import Bootstrap
+
+
+# NOTE: A SparseValue is reduced from its explicit values and its fill value,
+# counted once per parent that shares it, without expanding it.
+def _reduce(value: dict, dense: Callable, sparse: Callable) -> Any:
+    if isinstance(value, SparseValue):
+        return sparse(
+            list(value.explicit().values()), value.fill(), value.num_fill()
+        )
+    return dense(value.values())
+
+
+def _sparse_sum(values: list, fill: Any, num_fill: int) -> Any:
+    return sum(values) + fill * num_fill
+
+
+def _sparse_mean(values: list, fill: Any, num_fill: int) -> Any:
+    return _sparse_sum(values, fill, num_fill) / (len(values) + num_fill)
+
+
+def _sparse_geometric_mean(values: list, fill: Any, num_fill: int) -> Any:
+    if not num_fill or fill <= 0:
+        return geometric_mean(values + [fill] * min(num_fill, 1))
+    logs = sum(log(value) for value in values) + num_fill * log(fill)
+    return exp(logs / (len(values) + num_fill))
+
+
+def _sparse_min(values: list, fill: Any, num_fill: int) -> Any:
+    return min(values + [fill] if num_fill else values)
+
+
+def _sparse_max(values: list, fill: Any, num_fill: int) -> Any:
+    return max(values + [fill] if num_fill else values)
+
+
+def _set_interval(
+    aggregated: Scalar,
+    stat: Scalar,
+    aggregator: AggregatorNode,
+    bootstrap: Optional["Bootstrap"],
+) -> None:
+    if bootstrap is not None:
+        aggregated._set_intervals(
+            {aggregator: bootstrap.interval(stat.value().values(), aggregator)}
+        )
+
 
 class SummationAggregator(AggregatorNode):
     def __init__(self) -> None:
         super().__init__("Sum", "Stats::SummationAggregator")
 
-    def aggregate(self, stat: Scalar) -> Scalar:
+    def aggregate(
+        self, stat: Scalar, bootstrap: Optional["Bootstrap"] = None
+    ) -> Scalar:
         if not isinstance(stat, Scalar):
             raise RuntimeError(
                 "SummationAggregator should only be used to aggregate a Scalar."
@@ -22,10 +74,11 @@ class SummationAggregator(AggregatorNode):
         )
         nona_stat = stat.dropna()
         new_value = nona_stat.value().copy()
-        new_value.update({self: sum(nona_stat.value().values())})
+        new_value.update({self: _reduce(nona_stat.value(), sum, _sparse_sum)})
         to_ret = Scalar(nona_stat.index(), nona_stat.name())
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
+        _set_interval(to_ret, nona_stat, self, bootstrap)
         return to_ret
 
 
@@ -33,7 +86,9 @@ class ArithmeticMeanAggregator(AggregatorNode):
     def __init__(self) -> None:
         super().__init__("ArithMean", "Stats::ArithmeticMeanAggregator")
 
-    def aggregate(self, stat: Scalar) -> Scalar:
+    def aggregate(
+        self, stat: Scalar, bootstrap: Optional["Bootstrap"] = None
+    ) -> Scalar:
         if not isinstance(stat, Scalar):
             raise RuntimeError(
                 "ArithmeticMeanAggregator should only be used to aggregate a Scalar."
@@ -44,10 +99,13 @@ class ArithmeticMeanAggregator(AggregatorNode):
         )
         nona_stat = stat.dropna()
         new_value = nona_stat.value().copy()
-        new_value.update({self: mean(nona_stat.value().values())})
+        new_value.update(
+            {self: _reduce(nona_stat.value(), mean, _sparse_mean)}
+        )
         to_ret = Scalar(nona_stat.index(), nona_stat.name())
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
+        _set_interval(to_ret, nona_stat, self, bootstrap)
         return to_ret
 
 
@@ -55,7 +113,9 @@ class GeometricMeanAggregator(AggregatorNode):
     def __init__(self) -> None:
         super().__init__("GeoMean", "Stats::GeometricMeanAggregator")
 
-    def aggregate(self, stat: Scalar) -> Scalar:
+    def aggregate(
+        self, stat: Scalar, bootstrap: Optional["Bootstrap"] = None
+    ) -> Scalar:
         if not isinstance(stat, Scalar):
             raise RuntimeError(
                 "GeometricMeanAggregator should only be used to aggregate a Scalar."
@@ -66,10 +126,17 @@ class GeometricMeanAggregator(AggregatorNode):
         )
         nona_stat = stat.dropna()
         new_value = nona_stat.value().copy()
-        new_value.update({self: geometric_mean(nona_stat.value().values())})
+        new_value.update(
+            {
+                self: _reduce(
+                    nona_stat.value(), geometric_mean, _sparse_geometric_mean
+                )
+            }
+        )
         to_ret = Scalar(nona_stat.index(), nona_stat.name())
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
+        _set_interval(to_ret, nona_stat, self, bootstrap)
         return to_ret
 
 
@@ -77,7 +144,9 @@ class MinAggregator(AggregatorNode):
     def __init__(self) -> None:
         super().__init__("Min", "Stats::MinAggregator")
 
-    def aggregate(self, stat: Scalar) -> Scalar:
+    def aggregate(
+        self, stat: Scalar, bootstrap: Optional["Bootstrap"] = None
+    ) -> Scalar:
         if not isinstance(stat, Scalar):
             raise RuntimeError(
                 "MinAggregator should only be used to aggregate a Scalar."
@@ -86,10 +155,11 @@ class MinAggregator(AggregatorNode):
         warn("MinAggregator will drop na values from the original stats.")
         nona_stat = stat.dropna()
         new_value = nona_stat.value().copy()
-        new_value.update({self: min(nona_stat.value().values())})
+        new_value.update({self: _reduce(nona_stat.value(), min, _sparse_min)})
         to_ret = Scalar(nona_stat.index(), nona_stat.name())
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
+        _set_interval(to_ret, nona_stat, self, bootstrap)
         return to_ret
 
 
@@ -98,7 +168,9 @@ class MaxAggregator(AggregatorNode):
     def __init__(self) -> None:
         super().__init__("Max", "Stats::MaxAggregator")
 
-    def aggregate(self, stat: Scalar) -> Scalar:
+    def aggregate(
+        self, stat: Scalar, bootstrap: Optional["Bootstrap"] = None
+    ) -> Scalar:
         if not isinstance(stat, Scalar):
             raise RuntimeError(
                 "MaxAggregator should only be used to aggregate a Scalar."
@@ -107,10 +179,11 @@ class MaxAggregator(AggregatorNode):
         warn("MaxAggregator will drop na values from the original stats.")
         nona_stat = stat.dropna()
         new_value = nona_stat.value().copy()
-        new_value.update({self: max(nona_stat.value().values())})
+        new_value.update({self: _reduce(nona_stat.value(), max, _sparse_max)})
         to_ret = Scalar(nona_stat.index(), nona_stat.name())
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
+        _set_interval(to_ret, nona_stat, self, bootstrap)
         return to_ret
 
 
@@ -170,3 +243,31 @@ class CombineAggregator(AggregatorNode):
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
         return to_ret
+
+
+# NOTE: numpy versions of the aggregators over one axis of an array, nan is
+# dropped like the aggregators drop na values. numpy is only imported here so
+# that importing the aggregators stays cheap.
+def _nan_geometric_mean(data, axis: int):
+    import numpy as np
+
+    # NOTE: statistics.geometric_mean raises on negative values, nanmean
+    # would silently drop their nan logs, so the result is nan instead.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            (data < 0).any(axis=axis),
+            np.nan,
+            np.exp(np.nanmean(np.log(data), axis=axis)),
+        )
+
+
+def array_reducer(aggregator_type: type) -> Optional[Callable]:
+    import numpy as np
+
+    return {
+        SummationAggregator: np.nansum,
+        ArithmeticMeanAggregator: np.nanmean,
+        GeometricMeanAggregator: _nan_geometric_mean,
+        MinAggregator: np.nanmin,
+        MaxAggregator: np.nanmax,
+    }.get(aggregator_type, None)
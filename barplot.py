@@ -1,5 +1,4 @@
 from functools import reduce
-from math import sqrt
 from matplotlib import pyplot as plt
 from matplotlib.patches import Patch
 from numpy import atleast_1d
@@ -10,8 +9,7 @@ from .base_types import Node
 from .compare_util import SmallestThing
 from .markers import get_color_from_id, get_hatch_from_id
 from .stats import Scalar
-from .util import map_values_to_id
-
+from .util import get_good_dimensions, map_values_to_id
 
 # TODO: Think about handling common parents, should it just be a string that
 # represents the path to the parent (i.e. should we track common parent paths)?
@@ -29,23 +27,26 @@ def _build_discriminator_mapping(
     common_parents: set[Node],
     to_figure_out: List[str],
     discriminator_mapping: Optional[dict[str, str]] = None,
+    unique_values: Optional[dict[str, List[Any]]] = None,
 ) -> dict[str, dict[str, int]]:
+    # NOTE: Values are kept in the order they are first seen. Set order
+    # depends on the hash seed of the process, so a figure rendered by a
+    # worker would come out with its groups in a different order.
     def _get_unique_values(indices: List[dict]) -> dict[str, List[Any]]:
         unique_values = dict()
         for index in indices:
             for key, value in index.items():
                 if key not in unique_values:
-                    unique_values[key] = set()
-                unique_values[key].add(value)
+                    unique_values[key] = dict()
+                unique_values[key][value] = None
         return {key: list(value) for key, value in unique_values.items()}
 
     def _figure_out_mapping(
         to_figure_out: List[str],
-        indices: List[dict],
+        unique_values: dict[str, List[Any]],
     ) -> dict[str, str]:
         ret = dict()
 
-        unique_values = _get_unique_values(indices)
         marker_count = [
             (marker, len(uniques)) for marker, uniques in unique_values.items()
         ]
@@ -69,6 +70,13 @@ def _build_discriminator_mapping(
         raise ValueError("All stats should have the same index keys.")
     the_indices = indices[0].keys()
 
+    # NOTE: Callers that already track the unique values of the index keys
+    # (e.g. a RunRegistry) can pass them in to avoid rescanning indices.
+    if unique_values is None:
+        unique_values = _get_unique_values(indices)
+    else:
+        unique_values = {key: list(unique_values[key]) for key in the_indices}
+
     mapping = dict()
     use_parent_as = None
     copy_to_figure_out = ["subgroup", "group", "hue", "hatch", "subplot"]
@@ -85,7 +93,7 @@ def _build_discriminator_mapping(
             copy_to_figure_out.remove("subgroup")
         mapping = _figure_out_mapping(
             to_figure_out=copy_to_figure_out,
-            indices=indices,
+            unique_values=unique_values,
         )
         mapping[use_parent_as] = "parent"
         warn(f"Automatically figured out mapping: {mapping}")
@@ -133,8 +141,9 @@ def _build_discriminator_mapping(
             mapping[value] = key
         mapping[use_parent_as] = "parent"
 
-    unique_values = _get_unique_values(indices)
-    unique_values["parent"] = list(common_parents)
+    unique_values["parent"] = sorted(
+        common_parents, key=lambda parent: parent.path()
+    )
 
     discriminator_map_map = dict()
     num_unique_values = dict()
@@ -163,20 +172,199 @@ def _draw_spanning_line(
     text: str,
     color: str,
     end_tick_height_multiplier: float,
-) -> None:
-    ax.hlines(y=y, xmin=xmin, xmax=xmax, color=color)
-    ax.plot(
+) -> tuple:
+    line = ax.hlines(y=y, xmin=xmin, xmax=xmax, color=color)
+    (tick,) = ax.plot(
         [xmin, xmin],
         [y * end_tick_height_multiplier, y],
         color=color,
     )
-    ax.annotate(
+    annotation = ax.annotate(
         text,
         xy=((xmin + xmax) / 2, y),
         ha="center",
         va="bottom",
         color=color,
     )
+    return line, tick, annotation
+
+
+def _move_spanning_line(
+    artists: tuple,
+    xmin: Union[int, float],
+    xmax: Union[int, float],
+    y: Union[int, float],
+    end_tick_height_multiplier: float,
+) -> None:
+    line, tick, annotation = artists
+    line.set_segments([[(xmin, y), (xmax, y)]])
+    tick.set_data([xmin, xmin], [y * end_tick_height_multiplier, y])
+    # NOTE: Without an arrow the text sits at xyann, which is a copy of xy.
+    annotation.xy = ((xmin + xmax) / 2, y)
+    annotation.xyann = annotation.xy
+
+
+# NOTE: One errorbar call per subplot covers every bar of the subplot that
+# has an interval, intervals maps bar keys to (x, low, high).
+def _draw_error_bars(
+    ax: plt.axes,
+    bars: dict,
+    intervals: dict,
+    color: str,
+    capsize: float,
+) -> Any:
+    xs, heights, lows, highs = [], [], [], []
+    for key, (x, low, high) in intervals.items():
+        height = bars[key].get_height()
+        xs.append(x)
+        heights.append(height)
+        lows.append(max(0, height - low))
+        highs.append(max(0, high - height))
+    return ax.errorbar(
+        xs,
+        heights,
+        yerr=[lows, highs],
+        fmt="none",
+        ecolor=color,
+        capsize=capsize,
+    )
+
+
+class BarLayout:
+    discriminators = ["hue", "subgroup", "group", "hatch", "subplot"]
+
+    def __init__(
+        self,
+        indices: List[dict],
+        common_parents: set[Node],
+        discriminator_mapping: Optional[dict[str, str]] = None,
+        unique_values: Optional[dict[str, List[Any]]] = None,
+        bar_width: int = 1,
+        subgroup_gap: int = 1,
+        group_gap: int = 4,
+    ) -> None:
+        if len(common_parents) == 0:
+            raise ValueError("No common parents found in the provided stats.")
+        (
+            mapping,
+            discriminator_map_map,
+            num_unique_values,
+        ) = _build_discriminator_mapping(
+            indices,
+            common_parents,
+            BarLayout.discriminators,
+            discriminator_mapping,
+            unique_values,
+        )
+        self._keys = list(indices[0].keys())
+        self._common_parents = set(common_parents)
+        self._mapping = mapping
+        self._discriminator_map_map = discriminator_map_map
+        self._num_unique_values = num_unique_values
+        # NOTE: Reverse of discriminator_map_map, ids are list positions.
+        self._values = {
+            discriminator: list(value_to_id.keys())
+            for discriminator, value_to_id in discriminator_map_map.items()
+        }
+
+        self._bar_width = bar_width
+        self._subgroup_width = (
+            num_unique_values["hue"] * num_unique_values["hatch"] * bar_width
+        )
+        self._group_width = (
+            num_unique_values["subgroup"] * self._subgroup_width
+            + (num_unique_values["subgroup"] - 1) * subgroup_gap
+        )
+        self._global_offset = subgroup_gap
+        self._group_offset_multiplier = self._group_width + group_gap
+        self._subgroup_offset_multiplier = self._subgroup_width + subgroup_gap
+        self._hatch_offset_multiplier = num_unique_values["hue"] * bar_width
+        self._positions = dict()
+
+    @classmethod
+    def from_stats(cls, stats: List[Scalar], **kwargs) -> "BarLayout":
+        return cls(
+            [stat.index() for stat in stats],
+            _get_common_parents(stats),
+            **kwargs,
+        )
+
+    def mapping(self) -> dict[str, str]:
+        return self._mapping
+
+    def num_unique_values(self) -> dict[str, int]:
+        return self._num_unique_values
+
+    def common_parents(self) -> set[Node]:
+        return self._common_parents
+
+    def bar_width(self) -> int:
+        return self._bar_width
+
+    def subgroup_width(self) -> int:
+        return self._subgroup_width
+
+    def group_width(self) -> int:
+        return self._group_width
+
+    def _get_id_for(self, discriminator: str, index: dict, parent: Node):
+        tie = self._mapping.get(discriminator, None)
+        if tie is None:
+            return 0
+        value = parent if tie == "parent" else index[tie]
+        value_to_id = self._discriminator_map_map[discriminator]
+        if value not in value_to_id:
+            raise ValueError(f"{tie}: {value} is not part of this layout.")
+        return value_to_id[value]
+
+    # NOTE: Returns (subplot_id, group_id, subgroup_id, hue_id, hatch_id, x).
+    # Positions are cached so reusing a layout only pays for dict lookups.
+    def position(self, index: dict, parent: Node) -> tuple:
+        key = (tuple(index[key] for key in self._keys), parent)
+        if key not in self._positions:
+            ids = {
+                discriminator: self._get_id_for(discriminator, index, parent)
+                for discriminator in BarLayout.discriminators
+            }
+            x = (
+                self.group_left(ids["group"])
+                + ids["subgroup"] * self._subgroup_offset_multiplier
+                + ids["hatch"] * self._hatch_offset_multiplier
+                + ids["hue"] * self._bar_width
+                + (self._bar_width / 2)
+            )
+            self._positions[key] = (
+                ids["subplot"],
+                ids["group"],
+                ids["subgroup"],
+                ids["hue"],
+                ids["hatch"],
+                x,
+            )
+        return self._positions[key]
+
+    def group_left(self, group_id: int) -> float:
+        return (
+            self._global_offset
+            + group_id * self._group_offset_multiplier
+            - (self._bar_width / 2)
+        )
+
+    def subgroup_left(self, group_id: int, subgroup_id: int) -> float:
+        return (
+            self.group_left(group_id)
+            + subgroup_id * self._subgroup_offset_multiplier
+        )
+
+    def value_for(self, discriminator: str, id: int) -> Any:
+        values = self._values[discriminator]
+        return values[id] if id < len(values) else None
+
+    def label_for(self, discriminator: str, id: int) -> str:
+        return (
+            f"{self._mapping[discriminator]}: "
+            f"{self.value_for(discriminator, id)}"
+        )
 
 
 def plot_bar(
@@ -189,37 +377,44 @@ def plot_bar(
     figsize: Optional[tuple[int, int]] = (14, 8.32),
     hatch_density: Optional[int] = 3,
     hatch_color: Optional[str] = "black",
-    bar_width: int = 1,
-    subgroup_gap: int = 1,
-    group_gap: int = 4,
+    bar_width: Optional[int] = None,
+    subgroup_gap: Optional[int] = None,
+    group_gap: Optional[int] = None,
     annotation_color: str = "black",
     end_tick_height_multiplier: float = 0.9875,
     subgroup_id_height_multiplier: float = 1.0375,
     group_id_height_multiplier: float = 1.075,
+    unique_values: Optional[dict[str, List[Any]]] = None,
+    layout: Optional[BarLayout] = None,
+    live: bool = False,
+    error_bars: bool = True,
+    error_color: str = "black",
+    capsize: float = 3,
     **kwargs,
-) -> tuple[plt.figure, List[plt.axes]]:
-    # NOTE: Discriminators for distinguishing different values
-    to_figure_out = ["hue", "subgroup", "group", "hatch", "subplot"]
-    common_parents = _get_common_parents(stats)
-    num_common_parents = len(common_parents)
-    if num_common_parents == 0:
-        raise ValueError("No common parents found in the provided stats.")
-    (
-        mapping,
-        discriminator_map_map,
-        num_unique_values,
-    ) = _build_discriminator_mapping(
-        [stat.index() for stat in stats],
-        common_parents,
-        to_figure_out,
-        discriminator_mapping,
-    )
-
-    def _get_good_dimensions(one_d: int) -> tuple[int, int]:
-        side = int(sqrt(one_d))
-        while one_d % side != 0:
-            side -= 1
-        return max(side, one_d // side), min(side, one_d // side)
+) -> Union[tuple[plt.figure, List[plt.axes]], "LiveBarPlot"]:
+    # NOTE: A layout only depends on the indices and common parents of the
+    # stats. Pass one in to reuse it across stats from the same sweep.
+    layout_kwargs = {
+        name: value
+        for name, value in [
+            ("discriminator_mapping", discriminator_mapping),
+            ("unique_values", unique_values),
+            ("bar_width", bar_width),
+            ("subgroup_gap", subgroup_gap),
+            ("group_gap", group_gap),
+        ]
+        if value is not None
+    }
+    if layout is None:
+        layout = BarLayout.from_stats(stats, **layout_kwargs)
+    elif layout_kwargs:
+        raise ValueError(
+            f"{list(layout_kwargs.keys())} are part of the layout, "
+            "pass them to BarLayout instead."
+        )
+    mapping = layout.mapping()
+    num_unique_values = layout.num_unique_values()
+    common_parents = layout.common_parents()
 
     if nrows is not None and ncols is not None:
         if nrows * ncols != num_unique_values["subplot"]:
@@ -233,7 +428,7 @@ def plot_bar(
             "If one of nrows or ncols is provided, both should be provided."
         )
     else:
-        nrows, ncols = _get_good_dimensions(num_unique_values["subplot"])
+        nrows, ncols = get_good_dimensions(num_unique_values["subplot"])
 
     if nrows is None or ncols is None:
         raise RuntimeError("Something went wrong with the dimensions.")
@@ -243,18 +438,6 @@ def plot_bar(
     if sharey and ncols == 1:
         warn(f"`sharey` set to True when there is one column.")
 
-    subgroup_width = (
-        num_unique_values["hue"] * num_unique_values["hatch"] * bar_width
-    )
-    group_width = (
-        num_unique_values["subgroup"] * subgroup_width
-        + (num_unique_values["subgroup"] - 1) * subgroup_gap
-    )
-    global_offset = subgroup_gap
-    group_offset_multiplier = group_width + group_gap
-    subgroup_offset_multiplier = subgroup_width + subgroup_gap
-    hatch_offset_multiplier = num_unique_values["hue"] * bar_width
-
     fig, axes = plt.subplots(
         nrows=nrows,
         ncols=ncols,
@@ -267,32 +450,11 @@ def plot_bar(
     axes = atleast_1d(axes)
     axes = axes.flatten()
 
-    def _get_discriminator_value(
-        discriminator: str, mapping: dict, index: dict, parent: Node
-    ):
-        tie = mapping.get(discriminator, None)
-        if tie == "parent":
-            return parent
-        elif tie is not None:
-            return index[mapping[discriminator]]
-        else:
-            return None
-
-    def _get_id_for(
-        discriminator: str,
-        index: dict,
-        parent: Node,
-        mapping,
-        discriminator_map_map,
-    ):
-        discriminator_value = _get_discriminator_value(
-            discriminator, mapping, index, parent
-        )
-        if discriminator_value is not None:
-            return discriminator_map_map[discriminator][discriminator_value]
-        else:
-            return 0
-
+    # NOTE: Bars are collected per (subplot, hue, hatch) series and drawn
+    # with one call to `bar` per series. One call per bar creates a
+    # BarContainer per bar which dominates the time for large sweeps.
+    series = dict()
+    intervals = dict()
     max_height = dict()
     for stat in stats:
         index = stat.index()
@@ -300,40 +462,30 @@ def plot_bar(
         for parent in parents:
             if parent not in common_parents:
                 continue
-            hue_id = _get_id_for(
-                "hue", index, parent, mapping, discriminator_map_map
-            )
-            color = get_color_from_id(hue_id)
-            hatch_id = _get_id_for(
-                "hatch", index, parent, mapping, discriminator_map_map
-            )
-            pattern = get_hatch_from_id(hatch_id)
-            group_id = _get_id_for(
-                "group", index, parent, mapping, discriminator_map_map
-            )
-            subgroup_id = _get_id_for(
-                "subgroup", index, parent, mapping, discriminator_map_map
-            )
-            subplot_id = _get_id_for(
-                "subplot", index, parent, mapping, discriminator_map_map
-            )
+            (
+                subplot_id,
+                group_id,
+                subgroup_id,
+                hue_id,
+                hatch_id,
+                x,
+            ) = layout.position(index, parent)
             height = stat.value()[parent]
-            x = (
-                global_offset
-                + group_id * group_offset_multiplier
-                + subgroup_id * subgroup_offset_multiplier
-                + hatch_id * hatch_offset_multiplier
-                + hue_id * bar_width
-            )
 
-            axes[subplot_id].bar(
-                x=x,
-                height=height,
-                width=bar_width,
-                color=color,
-                hatch=pattern * hatch_density,
-                edgecolor=hatch_color,
+            xs, heights, keys = series.setdefault(
+                (subplot_id, hue_id, hatch_id), ([], [], [])
             )
+            key = (subplot_id, group_id, subgroup_id, hue_id, hatch_id)
+            xs.append(x)
+            heights.append(height)
+            keys.append(key)
+
+            # NOTE: Bars with a confidence interval (see Bootstrap) get an
+            # error bar and the spanning lines are moved above it.
+            interval = stat.interval(parent) if error_bars else None
+            if interval is not None:
+                intervals.setdefault(subplot_id, dict())[key] = (x, *interval)
+                height = max(height, interval[1])
 
             if subplot_id not in max_height:
                 max_height[subplot_id] = dict()
@@ -352,18 +504,29 @@ def plot_bar(
                 max_height[subplot_id][group_id][subgroup_id],
             )
 
-    def _get_value_for(
-        discriminator: str, discriminator_map_map: dict, id
-    ) -> str:
-        for key, value in discriminator_map_map[discriminator].items():
-            if value == id:
-                return key
+    bars = dict()
+    for (subplot_id, hue_id, hatch_id), (xs, heights, keys) in series.items():
+        container = axes[subplot_id].bar(
+            x=xs,
+            height=heights,
+            width=layout.bar_width(),
+            color=get_color_from_id(hue_id),
+            hatch=get_hatch_from_id(hatch_id) * hatch_density,
+            edgecolor=hatch_color,
+        )
+        bars.update(zip(keys, container.patches))
+    errors = {
+        subplot_id: _draw_error_bars(
+            axes[subplot_id], bars, subplot_intervals, error_color, capsize
+        )
+        for subplot_id, subplot_intervals in intervals.items()
+    }
 
     hue_patches = [
         Patch(
             facecolor=get_color_from_id(i),
             hatch="",
-            label=f"{mapping['hue']}: {_get_value_for('hue', discriminator_map_map, i)}",
+            label=layout.label_for("hue", i),
         )
         for i in range(num_unique_values["hue"])
     ]
@@ -371,58 +534,229 @@ def plot_bar(
         Patch(
             facecolor="white",
             hatch=get_hatch_from_id(i) * (hatch_density + 1),
-            label=f"{mapping['hatch']}: {_get_value_for('hatch', discriminator_map_map, i)}",
+            label=layout.label_for("hatch", i),
             edgecolor=hatch_color,
         )
         for i in range(num_unique_values["hatch"])
     ]
     handles = hue_patches + hatch_patches
+    spans = dict()
     for subplot_id, ax in enumerate(axes):
         # FIXME: what if there are not more than one subplot?
-        ax.title.set_text(
-            f"{mapping['subplot']}: {_get_value_for('subplot', discriminator_map_map, subplot_id)}"
-        )
+        ax.title.set_text(layout.label_for("subplot", subplot_id))
         for group_id in range(num_unique_values["group"]):
             for subgroup_id in range(num_unique_values["subgroup"]):
                 tall_bar = (
                     max_height[subplot_id][group_id][subgroup_id]
                     * subgroup_id_height_multiplier
                 )
-                left = (
-                    global_offset
-                    + group_id * group_offset_multiplier
-                    + subgroup_id * subgroup_offset_multiplier
-                    - (bar_width / 2)
-                )
-                right = left + subgroup_width
-                _draw_spanning_line(
-                    ax,
-                    left,
-                    right,
-                    tall_bar,
-                    f"{mapping['subgroup']}: {_get_value_for('subgroup', discriminator_map_map, subgroup_id)}",
-                    annotation_color,
-                    end_tick_height_multiplier,
+                left = layout.subgroup_left(group_id, subgroup_id)
+                right = left + layout.subgroup_width()
+                spans[(subplot_id, group_id, subgroup_id)] = (
+                    _draw_spanning_line(
+                        ax,
+                        left,
+                        right,
+                        tall_bar,
+                        layout.label_for("subgroup", subgroup_id),
+                        annotation_color,
+                        end_tick_height_multiplier,
+                    )
                 )
             tall_bar = (
                 max_height[subplot_id][group_id]["max_height"]
                 * group_id_height_multiplier
             )
-            left = (
-                global_offset
-                + group_id * group_offset_multiplier
-                - (bar_width / 2)
-            )
-            right = left + group_width
-            _draw_spanning_line(
+            left = layout.group_left(group_id)
+            right = left + layout.group_width()
+            spans[(subplot_id, group_id, None)] = _draw_spanning_line(
                 ax,
                 left,
                 right,
                 tall_bar,
-                f"{mapping['group']}: {_get_value_for('group', discriminator_map_map, group_id)}",
+                layout.label_for("group", group_id),
                 annotation_color,
                 end_tick_height_multiplier,
             )
         ax.legend(handles=handles)
 
+    if live:
+        return LiveBarPlot(
+            fig,
+            axes,
+            layout,
+            bars,
+            spans,
+            end_tick_height_multiplier,
+            subgroup_id_height_multiplier,
+            group_id_height_multiplier,
+            intervals,
+            errors,
+            error_bars,
+            error_color,
+            capsize,
+        )
     return fig, axes
+
+
+class LiveBarPlot:
+    def __init__(
+        self,
+        fig: plt.figure,
+        axes: List[plt.axes],
+        layout: BarLayout,
+        bars: dict,
+        spans: dict,
+        end_tick_height_multiplier: float,
+        subgroup_id_height_multiplier: float,
+        group_id_height_multiplier: float,
+        intervals: dict,
+        errors: dict,
+        error_bars: bool,
+        error_color: str,
+        capsize: float,
+    ) -> None:
+        self._fig = fig
+        self._axes = axes
+        self._layout = layout
+        self._bars = bars
+        self._spans = spans
+        self._end_tick_height_multiplier = end_tick_height_multiplier
+        self._subgroup_id_height_multiplier = subgroup_id_height_multiplier
+        self._group_id_height_multiplier = group_id_height_multiplier
+        # NOTE: Per subplot, bar key to (x, low, high) and the errorbar
+        # container drawing them.
+        self._intervals = intervals
+        self._errors = errors
+        self._error_bars = error_bars
+        self._error_color = error_color
+        self._capsize = capsize
+
+    def figure(self) -> plt.figure:
+        return self._fig
+
+    def axes(self) -> List[plt.axes]:
+        return self._axes
+
+    def layout(self) -> BarLayout:
+        return self._layout
+
+    # NOTE: Bars are keyed by (subplot, group, subgroup, hue, hatch) ids.
+    def bars(self) -> dict:
+        return self._bars
+
+    def update(self, stats: List[Scalar]) -> set[int]:
+        changed = set()
+        errors_changed = set()
+        common_parents = self._layout.common_parents()
+        for stat in stats:
+            index = stat.index()
+            for parent in stat.parents():
+                if parent not in common_parents:
+                    continue
+                (
+                    subplot_id,
+                    group_id,
+                    subgroup_id,
+                    hue_id,
+                    hatch_id,
+                    x,
+                ) = self._layout.position(index, parent)
+                key = (subplot_id, group_id, subgroup_id, hue_id, hatch_id)
+                if key not in self._bars:
+                    warn(
+                        f"No bar for {stat.name()} at {index} and {parent}. "
+                        "Call plot_bar again to add new bars."
+                    )
+                    continue
+                height = stat.value()[parent]
+                intervals = self._intervals.setdefault(subplot_id, dict())
+                interval = stat.interval(parent) if self._error_bars else None
+                interval = None if interval is None else (x, *interval)
+                if intervals.get(key) != interval:
+                    if interval is None:
+                        del intervals[key]
+                    else:
+                        intervals[key] = interval
+                    errors_changed.add(subplot_id)
+                if self._bars[key].get_height() != height:
+                    self._bars[key].set_height(height)
+                    changed.add(subplot_id)
+                    if key in intervals:
+                        errors_changed.add(subplot_id)
+        for subplot_id in errors_changed:
+            self._move_error_bars(subplot_id)
+        changed |= errors_changed
+        if changed:
+            self._move_spans(changed)
+            self._redraw(changed)
+        return changed
+
+    # NOTE: An errorbar container can not be moved, it is redrawn.
+    def _move_error_bars(self, subplot_id: int) -> None:
+        if subplot_id in self._errors:
+            self._errors.pop(subplot_id).remove()
+        intervals = self._intervals.get(subplot_id)
+        if intervals:
+            self._errors[subplot_id] = _draw_error_bars(
+                self._axes[subplot_id],
+                self._bars,
+                intervals,
+                self._error_color,
+                self._capsize,
+            )
+
+    def _move_spans(self, subplot_ids: set[int]) -> None:
+        max_height = dict()
+        for key, bar in self._bars.items():
+            subplot_id, group_id, subgroup_id, _, _ = key
+            if subplot_id not in subplot_ids:
+                continue
+            height = bar.get_height()
+            interval = self._intervals.get(subplot_id, dict()).get(key)
+            if interval is not None:
+                height = max(height, interval[2])
+            for span in [
+                (subplot_id, group_id, subgroup_id),
+                (subplot_id, group_id, None),
+            ]:
+                max_height[span] = max(
+                    max_height.get(span, SmallestThing()), height
+                )
+        for span, height in max_height.items():
+            subplot_id, group_id, subgroup_id = span
+            if subgroup_id is None:
+                left = self._layout.group_left(group_id)
+                right = left + self._layout.group_width()
+                y = height * self._group_id_height_multiplier
+            else:
+                left = self._layout.subgroup_left(group_id, subgroup_id)
+                right = left + self._layout.subgroup_width()
+                y = height * self._subgroup_id_height_multiplier
+            _move_spanning_line(
+                self._spans[span],
+                left,
+                right,
+                y,
+                self._end_tick_height_multiplier,
+            )
+
+    # NOTE: Changed axes are blitted in place as long as their limits hold,
+    # otherwise the tick labels change too and the figure is redrawn.
+    def _redraw(self, subplot_ids: set[int]) -> None:
+        canvas = self._fig.canvas
+        full_redraw = not canvas.supports_blit
+        for subplot_id in subplot_ids:
+            ax = self._axes[subplot_id]
+            limits = (ax.get_xlim(), ax.get_ylim())
+            ax.relim()
+            ax.autoscale_view()
+            if limits != (ax.get_xlim(), ax.get_ylim()):
+                full_redraw = True
+        if full_redraw:
+            canvas.draw_idle()
+            return
+        for subplot_id in subplot_ids:
+            ax = self._axes[subplot_id]
+            ax.redraw_in_frame()
+            canvas.blit(ax.bbox)
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from threading import Lock
 from typing import final, List, Set
 
 from .singleton_meta import SingletonMeta
@@ -6,11 +7,15 @@ from .singleton_meta import SingletonMeta
 
 class Node:
     _instance_number = -1
+    _id_lock = Lock()
 
+    # NOTE: Runs are loaded from thread pools, += on a class attribute is not
+    # atomic.
     @classmethod
     def get_id(cls) -> int:
-        cls._instance_number += 1
-        return cls._instance_number
+        with cls._id_lock:
+            cls._instance_number += 1
+            return cls._instance_number
 
     def __init__(self, name: str, path: str) -> None:
         self._name = name
@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+from typing import List, Optional, Union
+
+from .base_types import Node
+from .memory import dumps_by_path, loads_by_path
+from .stats import Scalar
+
+PathLike = Union[str, os.PathLike]
+
+
+class FigureSpec:
+    def __init__(
+        self,
+        path: PathLike,
+        stats: List[Scalar],
+        plot_kwargs: Optional[dict] = None,
+        savefig_kwargs: Optional[dict] = None,
+    ) -> None:
+        if plot_kwargs is not None and plot_kwargs.get("live", False):
+            raise ValueError("A live plot can not be rendered to a file.")
+        self._path = os.fspath(path)
+        self._stats = stats
+        self._plot_kwargs = plot_kwargs or dict()
+        self._savefig_kwargs = savefig_kwargs or dict()
+
+    def path(self) -> str:
+        return self._path
+
+    def stats(self) -> List[Scalar]:
+        return self._stats
+
+    def plot_kwargs(self) -> dict:
+        return self._plot_kwargs
+
+    def savefig_kwargs(self) -> dict:
+        return self._savefig_kwargs
+
+
+# NOTE: Only the index, name and (path, name, value, interval) of every
+# parent are shipped to workers, never the Node trees the stats point into.
+# Nodes in plot_kwargs (e.g. in a BarLayout) are shipped as their paths too.
+def _pack(spec: FigureSpec) -> tuple:
+    stats = [
+        (
+            stat.index(),
+            stat.name(),
+            [
+                (
+                    parent.path(),
+                    parent.name(),
+                    stat.value()[parent],
+                    stat.interval(parent),
+                )
+                for parent in stat.parents()
+            ],
+        )
+        for stat in spec.stats()
+    ]
+    return (
+        spec.path(),
+        stats,
+        dumps_by_path(spec.plot_kwargs()),
+        spec.savefig_kwargs(),
+    )
+
+
+def _unpack(stats: list, nodes: dict[str, Node]) -> List[Scalar]:
+    ret = []
+    for index, name, values in stats:
+        stat = Scalar(index, name)
+        for path, node_name, value, interval in values:
+            if path not in nodes:
+                nodes[path] = Node(node_name, path)
+            stat.value()[nodes[path]] = value
+            stat.parents().append(nodes[path])
+            if interval is not None:
+                stat.intervals()[nodes[path]] = interval
+        ret.append(stat)
+    return ret
+
+
+def _init_worker(backend: str) -> None:
+    import warnings
+
+    import matplotlib
+
+    matplotlib.use(backend)
+    warnings.simplefilter("ignore")
+
+
+def _render(
+    path: str, stats: list, plot_kwargs: bytes, savefig_kwargs: dict
+) -> float:
+    from matplotlib import pyplot as plt
+
+    from .barplot import plot_bar
+
+    start = perf_counter()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    nodes = dict()
+    stats = _unpack(stats, nodes)
+    fig, _ = plot_bar(stats, **loads_by_path(plot_kwargs, nodes))
+    # NOTE: The format (png, pdf, svg, ...) follows the file extension.
+    fig.savefig(path, **savefig_kwargs)
+    plt.close(fig)
+    return perf_counter() - start
+
+
+# NOTE: Renders in this process with the same backend and warning filter as
+# a worker, so serial and parallel output match. The caller's backend is put
+# back afterwards.
+def _render_serial(packed: List[tuple], backend: str) -> List[float]:
+    import warnings
+
+    from matplotlib import pyplot as plt
+
+    previous = plt.get_backend()
+    plt.switch_backend(backend)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return [_render(*args) for args in packed]
+    finally:
+        plt.switch_backend(previous)
+
+
+def render_figures(
+    specs: List[FigureSpec],
+    max_workers: Optional[int] = None,
+    backend: str = "Agg",
+) -> List[tuple[str, float]]:
+    if not specs:
+        return []
+    packed = [_pack(spec) for spec in specs]
+    if max_workers is None:
+        max_workers = min(len(specs), os.cpu_count() or 1)
+    if max_workers == 1:
+        timings = _render_serial(packed, backend)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend,),
+        ) as executor:
+            timings = list(executor.map(_render, *zip(*packed)))
+    return [(spec.path(), timing) for spec, timing in zip(specs, timings)]
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+
+_package = __package__.rsplit(".", 1)[0]
+
+_data_modules = [
+    "base_types",
+    "stats",
+    "aggregators",
+    "json_interface",
+    "run",
+    "loaders",
+    "registry",
+    "warehouse",
+    "markers",
+]
+
+_probe = """
+import sys
+from time import perf_counter
+start = perf_counter()
+import {package}
+{imports}
+elapsed = perf_counter() - start
+print(elapsed, int("matplotlib" in sys.modules))
+"""
+
+
+# NOTE: Runs in a fresh interpreter, an import in this process would be
+# served from sys.modules.
+def bench_import(modules: list[str] = _data_modules) -> tuple[float, bool]:
+    code = _probe.format(
+        package=_package,
+        imports="\n".join(f"import {_package}.{name}" for name in modules),
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(out[0]), out[1] == "1"
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--budget", type=float, default=0.2)
+    args = parser.parse_args()
+    elapsed, has_matplotlib = bench_import()
+    print(f"seconds\t{elapsed:.3f}")
+    if has_matplotlib:
+        sys.exit("Importing the data layer pulled in matplotlib.")
+    if elapsed > args.budget:
+        sys.exit(f"Import took longer than the {args.budget}s budget.")
@@ -0,0 +1,79 @@
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import List
+
+from ..base_types import Node
+from ..stats import Scalar
+
+
+def make_bar_stats(num_bars: int, num_parents: int = 2) -> List[Scalar]:
+    parents = [Node(f"cpu{i}", f"system.cpu{i}") for i in range(num_parents)]
+    hues = ["o3", "timing", "minor", "atomic"]
+    hatches = ["O2", "O3"]
+    subplots = ["512kB", "1MB"]
+    per_group = num_parents * len(hues) * len(hatches) * len(subplots)
+    num_groups = max(1, num_bars // per_group)
+
+    stats = []
+    for group in range(num_groups):
+        for hue in hues:
+            for hatch in hatches:
+                for subplot in subplots:
+                    index = {
+                        "bench": f"bench{group}",
+                        "cpu": hue,
+                        "opt": hatch,
+                        "l2": subplot,
+                    }
+                    stat = Scalar(index, "ipc")
+                    stat._set_value(
+                        {
+                            parent: 1 + (group + i) % 7 / 7
+                            for i, parent in enumerate(parents)
+                        }
+                    )
+                    stat._set_parents(list(parents))
+                    stats.append(stat)
+    return stats
+
+
+def bench_plot_bar(num_bars: int) -> tuple[int, float]:
+    from matplotlib import pyplot as plt
+
+    from ..barplot import plot_bar
+
+    stats = make_bar_stats(num_bars)
+    start = perf_counter()
+    fig, axes = plot_bar(
+        stats,
+        {
+            "bench": "group",
+            "cpu": "hue",
+            "opt": "hatch",
+            "l2": "subplot",
+            "parent": "subgroup",
+        },
+    )
+    fig.canvas.draw()
+    elapsed = perf_counter() - start
+    plt.close(fig)
+    return len(stats) * len(stats[0].parents()), elapsed
+
+
+if __name__ == "__main__":
+    import warnings
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    warnings.simplefilter("ignore")
+
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--bars", type=int, nargs="+", default=[256, 1024, 4096]
+    )
+    args = parser.parse_args()
+    print("bars\tseconds")
+    for num_bars in args.bars:
+        bars, elapsed = bench_plot_bar(num_bars)
+        print(f"{bars}\t{elapsed:.3f}")
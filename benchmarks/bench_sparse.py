@@ -0,0 +1,122 @@
+import tracemalloc
+from argparse import ArgumentParser
+from math import isclose
+from time import perf_counter
+from typing import Optional
+
+from ..aggregators import ArithmeticMeanAggregator, SummationAggregator
+from ..base_types import Node
+from ..json_interface import compile_json_stats
+from ..memory import sizeof_stats
+from ..stats import Scalar
+from .synthetic import make_runs
+
+
+def _compile(runs: list, max_density: Optional[float]) -> list:
+    return [
+        compile_json_stats(
+            index, stats_json, {}, Node("root", ""), max_density
+        )
+        for index, stats_json in runs
+    ]
+
+
+def _timed(runs: list, max_density: Optional[float]) -> float:
+    start = perf_counter()
+    _compile(runs, max_density)
+    return perf_counter() - start
+
+
+# NOTE: Retained bytes are what tracemalloc still sees allocated once the
+# stats are compiled, so the shared keys of the sparse stats are counted.
+def _retained(runs: list, max_density: Optional[float]) -> tuple:
+    tracemalloc.start()
+    try:
+        compiled = _compile(runs, max_density)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return compiled, retained
+
+
+def _check(dense: list, sparse: list) -> None:
+    for dense_stats, sparse_stats in zip(dense, sparse):
+        for name, stat in dense_stats.items():
+            if not isinstance(stat, Scalar):
+                continue
+            other = sparse_stats[name]
+            if dict(stat.value()) != dict(other.value()):
+                raise RuntimeError(f"{name} differs between dense and sparse.")
+            for aggregator in [
+                SummationAggregator(),
+                ArithmeticMeanAggregator(),
+            ]:
+                expected = stat.aggregate_using(aggregator).value()
+                got = other.aggregate_using(aggregator).value()
+                if not isclose(expected[aggregator], got[aggregator]):
+                    raise RuntimeError(
+                        f"{type(aggregator).__name__} of {name} differs "
+                        "between dense and sparse."
+                    )
+
+
+def bench_sparse(
+    num_runs: int = 4,
+    num_sim_objects: int = 256,
+    stats_per_object: int = 32,
+    zero_ratio: float = 0.9,
+    max_density: float = 0.25,
+    repeat: int = 3,
+) -> dict:
+    runs = make_runs(
+        num_runs,
+        num_sim_objects=num_sim_objects,
+        stats_per_object=stats_per_object,
+        zero_ratio=zero_ratio,
+    )
+    # NOTE: Both are timed before anything is kept alive, a large heap makes
+    # the garbage collector slow down whatever runs second.
+    dense_seconds = min(_timed(runs, None) for _ in range(repeat))
+    sparse_seconds = min(_timed(runs, max_density) for _ in range(repeat))
+    dense, dense_bytes = _retained(runs, None)
+    sparse, sparse_bytes = _retained(runs, max_density)
+    _check(dense, sparse)
+    return {
+        "dense_seconds": dense_seconds,
+        "sparse_seconds": sparse_seconds,
+        "dense_bytes": dense_bytes,
+        "sparse_bytes": sparse_bytes,
+        "dense_stats_bytes": sum(sizeof_stats(stats) for stats in dense),
+        "sparse_stats_bytes": sum(sizeof_stats(stats) for stats in sparse),
+    }
+
+
+if __name__ == "__main__":
+    import warnings
+
+    warnings.simplefilter("ignore")
+
+    parser = ArgumentParser()
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--sim-objects", type=int, default=256)
+    parser.add_argument("--stats-per-object", type=int, default=32)
+    parser.add_argument("--zero-ratio", type=float, default=0.9)
+    parser.add_argument("--max-density", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    results = bench_sparse(
+        args.runs,
+        args.sim_objects,
+        args.stats_per_object,
+        args.zero_ratio,
+        args.max_density,
+        args.repeat,
+    )
+    for name, value in results.items():
+        print(
+            f"{name}\t{value:.3f}" if "seconds" in name else f"{name}\t{value}"
+        )
+    print(
+        "reduction\t"
+        f"{1 - results['sparse_bytes'] / results['dense_bytes']:.1%}"
+    )
@@ -0,0 +1,198 @@
+import json
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from ..aggregators import (
+    ArithmeticMeanAggregator,
+    CombineAggregator,
+    GeometricMeanAggregator,
+    MaxAggregator,
+    MinAggregator,
+    SummationAggregator,
+)
+from ..base_types import Node
+from ..json_interface import compile_json_stats, create_graph_format
+from ..loaders import load_many_json_stats
+from ..stats import Distribution, Scalar
+from .bench_plot_bar import bench_plot_bar
+from .synthetic import make_runs, write_stats_files
+
+
+def _compile(runs: List[tuple]) -> List[tuple[Node, dict]]:
+    compiled = []
+    for index, stats_json in runs:
+        root = Node("root", "")
+        compiled.append(
+            (root, compile_json_stats(index, stats_json, {}, root))
+        )
+    return compiled
+
+
+def _of_type(compiled: List[tuple[Node, dict]], stat_type: type) -> List:
+    return [
+        stat
+        for _, stats in compiled
+        for stat in stats.values()
+        if isinstance(stat, stat_type)
+    ]
+
+
+# NOTE: Operands must come from the same run, so chains pair up neighbouring
+# Scalars of every run.
+def _arithmetic(compiled: List[tuple[Node, dict]], chain_length: int) -> None:
+    for _, stats in compiled:
+        scalars = [stat for stat in stats.values() if isinstance(stat, Scalar)]
+        for left, right in zip(scalars, scalars[1:]):
+            stat = left
+            for _ in range(chain_length):
+                stat = (stat + right) * 2 - right / 3
+
+
+def _aggregate(stats: List, aggregator: Callable) -> None:
+    for stat in stats:
+        stat.aggregate_using(aggregator)
+
+
+# NOTE: max_workers=None loads in one process per CPU, compare it with the
+# serial load to see the speedup of the process pool.
+def _load(files: List[tuple[dict, str]], max_workers: Optional[int]) -> None:
+    load_many_json_stats(
+        [path for _, path in files],
+        [index for index, _ in files],
+        max_workers,
+    )
+
+
+def _graph(compiled: List[tuple[Node, dict]]) -> None:
+    for root, _ in compiled:
+        create_graph_format(root)
+
+
+def measure(fn: Callable, *args, repeat: int = 3) -> tuple[float, int]:
+    # NOTE: tracemalloc slows allocation down, so wall time and peak memory
+    # come from separate calls.
+    elapsed = min(_timed(fn, *args) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def _timed(fn: Callable, *args) -> float:
+    start = perf_counter()
+    fn(*args)
+    return perf_counter() - start
+
+
+def run_suite(
+    num_runs: int = 8,
+    num_sim_objects: int = 64,
+    depth: int = 4,
+    stats_per_object: int = 16,
+    distribution_ratio: float = 0.25,
+    num_bins: int = 32,
+    chain_length: int = 8,
+    num_bars: int = 1024,
+    repeat: int = 3,
+    skip_plot: bool = False,
+) -> List[tuple[str, float, int]]:
+    params = {
+        "num_sim_objects": num_sim_objects,
+        "depth": depth,
+        "stats_per_object": stats_per_object,
+        "distribution_ratio": distribution_ratio,
+        "num_bins": num_bins,
+    }
+    runs = make_runs(num_runs, **params)
+    compiled = _compile(runs)
+    scalars = _of_type(compiled, Scalar)
+    distributions = _of_type(compiled, Distribution)
+
+    benchmarks = [
+        ("compile_json_stats", _compile, runs),
+        ("scalar_arithmetic", _arithmetic, compiled, chain_length),
+    ]
+    for aggregator in [
+        SummationAggregator(),
+        ArithmeticMeanAggregator(),
+        GeometricMeanAggregator(),
+        MinAggregator(),
+        MaxAggregator(),
+    ]:
+        benchmarks.append(
+            (type(aggregator).__name__, _aggregate, scalars, aggregator)
+        )
+    benchmarks.append(
+        ("CombineAggregator", _aggregate, distributions, CombineAggregator())
+    )
+    benchmarks.append(("create_graph_format", _graph, compiled))
+    if not skip_plot:
+        benchmarks.append(("plot_bar", bench_plot_bar, num_bars))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_stats_files(directory, num_runs, **params)
+        benchmarks.append(("load_many_json_stats_serial", _load, files, 1))
+        benchmarks.append(("load_many_json_stats", _load, files, None))
+        for name, fn, *args in benchmarks:
+            elapsed, peak = measure(fn, *args, repeat=repeat)
+            results.append((name, elapsed, peak))
+    return results
+
+
+if __name__ == "__main__":
+    import warnings
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    warnings.simplefilter("ignore")
+
+    parser = ArgumentParser()
+    parser.add_argument("--runs", type=int, default=8)
+    parser.add_argument("--sim-objects", type=int, default=64)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--stats-per-object", type=int, default=16)
+    parser.add_argument("--distribution-ratio", type=float, default=0.25)
+    parser.add_argument("--bins", type=int, default=32)
+    parser.add_argument("--chain-length", type=int, default=8)
+    parser.add_argument("--bars", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-plot", action="store_true")
+    parser.add_argument(
+        "--output", help="Also write the results to this json file."
+    )
+    args = parser.parse_args()
+    params = {
+        "num_runs": args.runs,
+        "num_sim_objects": args.sim_objects,
+        "depth": args.depth,
+        "stats_per_object": args.stats_per_object,
+        "distribution_ratio": args.distribution_ratio,
+        "num_bins": args.bins,
+        "chain_length": args.chain_length,
+        "num_bars": args.bars,
+    }
+    results = run_suite(**params, repeat=args.repeat, skip_plot=args.skip_plot)
+    print("benchmark\tseconds\tpeak_kib")
+    for name, elapsed, peak in results:
+        print(f"{name}\t{elapsed:.4f}\t{peak / 1024:.1f}")
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "params": params,
+                    "results": [
+                        {"name": name, "seconds": elapsed, "peak_bytes": peak}
+                        for name, elapsed, peak in results
+                    ],
+                },
+                f,
+                indent=2,
+            )
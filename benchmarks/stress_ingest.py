@@ -0,0 +1,103 @@
+import sys
+import tempfile
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from ..aggregators import (
+    ArithmeticMeanAggregator,
+    CombineAggregator,
+    GeometricMeanAggregator,
+    MaxAggregator,
+    MinAggregator,
+    SummationAggregator,
+)
+from ..loaders import load_many_json_stats
+from ..stats import Distribution
+from .synthetic import write_stats_files
+
+_aggregators = [
+    SummationAggregator,
+    ArithmeticMeanAggregator,
+    GeometricMeanAggregator,
+    MinAggregator,
+    MaxAggregator,
+    CombineAggregator,
+]
+
+
+def _collect_ids(root, ids: list) -> None:
+    to_visit = [root]
+    while to_visit:
+        node = to_visit.pop()
+        ids.append(node.id())
+        to_visit.extend(node.children())
+
+
+def _aggregate(barrier: Barrier, runs: list) -> list:
+    barrier.wait()
+    instances = [aggregator() for aggregator in _aggregators]
+    for run in runs:
+        for stat in run.stats().values():
+            stat.aggregate_using(
+                instances[-1]
+                if isinstance(stat, Distribution)
+                else instances[0]
+            )
+    return instances
+
+
+def stress_ingest(
+    num_files: int, num_threads: int, num_sim_objects: int
+) -> list[str]:
+    errors = []
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_stats_files(
+            directory, num_files, num_sim_objects=num_sim_objects
+        )
+        runs = load_many_json_stats(
+            [path for _, path in files],
+            [index for index, _ in files],
+            max_workers=num_threads,
+        )
+    ids = []
+    for run in runs:
+        _collect_ids(run.root(), ids)
+    if len(ids) != len(set(ids)):
+        errors.append(f"{len(ids) - len(set(ids))} duplicate node ids.")
+
+    barrier = Barrier(num_threads)
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [
+            executor.submit(_aggregate, barrier, runs[i::num_threads])
+            for i in range(num_threads)
+        ]
+        instances = [future.result() for future in futures]
+    for aggregator_id, aggregator in enumerate(_aggregators):
+        if (
+            len({id(per_thread[aggregator_id]) for per_thread in instances})
+            != 1
+        ):
+            errors.append(f"{aggregator.__name__} was created twice.")
+    return errors
+
+
+if __name__ == "__main__":
+    import warnings
+
+    warnings.simplefilter("ignore")
+
+    parser = ArgumentParser()
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--sim-objects", type=int, default=64)
+    args = parser.parse_args()
+    # NOTE: Switch threads as often as possible to make races likely on
+    # builds with a GIL.
+    sys.setswitchinterval(1e-6)
+    errors = stress_ingest(args.files, args.threads, args.sim_objects)
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print("ok")
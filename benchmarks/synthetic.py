@@ -0,0 +1,124 @@
+import json
+import os
+from pathlib import Path
+from random import Random
+from typing import List, Union
+
+PathLike = Union[str, os.PathLike]
+
+
+def _make_scalar(rng: Random) -> dict:
+    return {"type": "Scalar", "value": rng.uniform(0.5, 1000.0)}
+
+
+def _make_distribution(rng: Random, num_bins: int, bin_size: int) -> dict:
+    return {
+        "type": "Distribution",
+        "value": [rng.randrange(0, 1000) for _ in range(num_bins)],
+        "num_bins": num_bins,
+        "bin_size": bin_size,
+        # NOTE: Every parent starts on a different multiple of bin_size so
+        # that combining the distributions widens the range.
+        "min": rng.randrange(0, num_bins) * bin_size,
+    }
+
+
+# NOTE: Every SimObject carries the same set of stat names, like gem5 objects
+# of one type do, so that each stat ends up with one parent per SimObject.
+def make_stats_json(
+    seed: int = 0,
+    num_sim_objects: int = 64,
+    depth: int = 4,
+    stats_per_object: int = 16,
+    distribution_ratio: float = 0.25,
+    num_bins: int = 32,
+    bin_size: int = 10,
+    zero_ratio: float = 0.0,
+    vector_ratio: float = 0.25,
+) -> dict:
+    if num_sim_objects < 1 or depth < 1:
+        raise ValueError("num_sim_objects and depth should be at least 1.")
+    # NOTE: depth counts the root, a tree of depth 1 is the root alone.
+    if depth == 1 and num_sim_objects > 1:
+        raise ValueError(
+            "depth should be at least 2 for more than one object."
+        )
+    if not 0 <= distribution_ratio <= 1:
+        raise ValueError("distribution_ratio should be between 0 and 1.")
+    if not 0 <= zero_ratio <= 1:
+        raise ValueError("zero_ratio should be between 0 and 1.")
+    if not 0 <= vector_ratio <= 1:
+        raise ValueError("vector_ratio should be between 0 and 1.")
+    rng = Random(seed)
+    num_distributions = round(stats_per_object * distribution_ratio)
+
+    def _make_sim_object(name: str) -> dict:
+        sim_object = {"type": "SimObject", "name": name}
+        for k in range(stats_per_object):
+            # NOTE: Stands in for unused ports, idle cores and the like, the
+            # stat is there but never counted anything.
+            if zero_ratio and rng.random() < zero_ratio:
+                if k < num_distributions:
+                    sim_object[f"dist{k}"] = {
+                        "type": "Distribution",
+                        "value": [0] * num_bins,
+                        "num_bins": num_bins,
+                        "bin_size": bin_size,
+                        "min": 0,
+                    }
+                else:
+                    sim_object[f"scalar{k}"] = {"type": "Scalar", "value": 0}
+            elif k < num_distributions:
+                sim_object[f"dist{k}"] = _make_distribution(
+                    rng, num_bins, bin_size
+                )
+            else:
+                sim_object[f"scalar{k}"] = _make_scalar(rng)
+        return sim_object
+
+    root = _make_sim_object("system")
+    levels = [[root]]
+    for obj_id in range(1, num_sim_objects):
+        # NOTE: Fill every level once before attaching at random so that the
+        # tree always reaches the requested depth.
+        level = obj_id if obj_id < depth else rng.randrange(1, depth)
+        parent = rng.choice(levels[level - 1])
+        child = _make_sim_object(f"obj{obj_id}")
+        # NOTE: Like system.cpu, some children are items of a SimObjectVector
+        # of their parent instead of being a SimObject of their own.
+        if vector_ratio and rng.random() < vector_ratio:
+            vector = parent.setdefault(
+                "objs", {"type": "SimObjectVector", "value": []}
+            )
+            vector["value"].append(child)
+        else:
+            parent[f"obj{obj_id}"] = child
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(child)
+    return {"system": root}
+
+
+def make_runs(num_runs: int = 8, seed: int = 0, **kwargs) -> List[tuple]:
+    return [
+        (
+            {"run": run, "config": f"config{run % 4}"},
+            make_stats_json(seed + run, **kwargs),
+        )
+        for run in range(num_runs)
+    ]
+
+
+def write_stats_files(
+    directory: PathLike, num_runs: int = 8, seed: int = 0, **kwargs
+) -> List[tuple[dict, str]]:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ret = []
+    for index, stats in make_runs(num_runs, seed, **kwargs):
+        path = directory / f"run{index['run']}" / "stats.json"
+        path.parent.mkdir(exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(stats, f)
+        ret.append((index, str(path)))
+    return ret
@@ -0,0 +1,151 @@
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from .aggregators import (
+    ArithmeticMeanAggregator,
+    GeometricMeanAggregator,
+    MaxAggregator,
+    MinAggregator,
+    SummationAggregator,
+)
+from .base_types import AggregatorNode
+from .util import to_float
+
+
+def _identity(values: np.ndarray) -> np.ndarray:
+    return values
+
+
+def _sum(resamples: np.ndarray) -> np.ndarray:
+    return resamples.sum(axis=1)
+
+
+def _mean(resamples: np.ndarray) -> np.ndarray:
+    return resamples.mean(axis=1)
+
+
+def _min(resamples: np.ndarray) -> np.ndarray:
+    return resamples.min(axis=1)
+
+
+def _max(resamples: np.ndarray) -> np.ndarray:
+    return resamples.max(axis=1)
+
+
+# NOTE: (transform, reduce, inverse) per aggregator. The geometric mean is
+# the arithmetic mean in log space, so values are logged once and every
+# resample only pays for a mean.
+_statistics = {
+    SummationAggregator: (_identity, _sum, _identity),
+    ArithmeticMeanAggregator: (_identity, _mean, _identity),
+    GeometricMeanAggregator: (np.log, _mean, np.exp),
+    MinAggregator: (_identity, _min, _identity),
+    MaxAggregator: (_identity, _max, _identity),
+}
+
+
+def _resample_batch(
+    values: np.ndarray,
+    reduce: Callable,
+    seed: np.random.SeedSequence,
+    num_resamples: int,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(values), size=(num_resamples, len(values)))
+    return reduce(values[picks])
+
+
+class Bootstrap:
+    def __init__(
+        self,
+        confidence: float = 0.95,
+        num_resamples: int = 10000,
+        seed: Optional[int] = 0,
+        batch_size: int = 1000,
+        max_workers: int = 1,
+    ) -> None:
+        if not 0 < confidence < 1:
+            raise ValueError("confidence should be between 0 and 1.")
+        if num_resamples < 1 or batch_size < 1:
+            raise ValueError(
+                "num_resamples and batch_size should be positive."
+            )
+        self._confidence = confidence
+        self._num_resamples = num_resamples
+        self._seed = seed
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+
+    def confidence(self) -> float:
+        return self._confidence
+
+    def num_resamples(self) -> int:
+        return self._num_resamples
+
+    def seed(self) -> Optional[int]:
+        return self._seed
+
+    # NOTE: Resamples are drawn in batches of batch_size rows so memory stays
+    # at (batch_size x len(values)). Every batch has its own child seed, which
+    # makes the result depend only on seed and never on max_workers.
+    def distribution(
+        self, values: Sequence, aggregator: AggregatorNode
+    ) -> np.ndarray:
+        if type(aggregator) not in _statistics:
+            raise ValueError(
+                f"{type(aggregator).__name__} has no bootstrap statistic."
+            )
+        transform, reduce, inverse = _statistics[type(aggregator)]
+        values = np.asarray([to_float(value) for value in values])
+        if len(values) == 0:
+            raise ValueError("Can not bootstrap an empty set of values.")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = transform(values)
+        sizes = [
+            min(self._batch_size, self._num_resamples - start)
+            for start in range(0, self._num_resamples, self._batch_size)
+        ]
+        seeds = np.random.SeedSequence(self._seed).spawn(len(sizes))
+        if self._max_workers == 1 or len(sizes) == 1:
+            batches = [
+                _resample_batch(values, reduce, seed, size)
+                for seed, size in zip(seeds, sizes)
+            ]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=get_context("spawn"),
+            ) as executor:
+                batches = list(
+                    executor.map(
+                        _resample_batch,
+                        [values] * len(sizes),
+                        [reduce] * len(sizes),
+                        seeds,
+                        sizes,
+                    )
+                )
+        return inverse(np.concatenate(batches))
+
+    def interval(
+        self, values: Sequence, aggregator: AggregatorNode
+    ) -> tuple[float, float]:
+        distribution = self.distribution(values, aggregator)
+        tail = (1 - self._confidence) / 2
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            low, high = np.nanquantile(distribution, [tail, 1 - tail])
+        return float(low), float(high)
+
+    def __str__(self) -> str:
+        return (
+            f"Bootstrap(confidence: {self._confidence}, "
+            f"num_resamples: {self._num_resamples}, seed: {self._seed})"
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,244 @@
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Callable, List, Optional, Sequence, Union
+
+from .loaders import load_json_stats
+from .memory import dumps_run, loads_run
+from .run import Run
+
+PathLike = Union[str, os.PathLike]
+
+
+class IngestReport:
+    def __init__(self) -> None:
+        self._num_ok = 0
+        self._num_skipped = 0
+        self._errors = []
+        self._runs = []
+        self._bytes = 0
+        self._seconds = 0.0
+
+    def num_ok(self) -> int:
+        return self._num_ok
+
+    def num_skipped(self) -> int:
+        return self._num_skipped
+
+    def errors(self) -> List[tuple[str, str]]:
+        return self._errors
+
+    def runs(self) -> List[Run]:
+        return self._runs
+
+    def bytes(self) -> int:
+        return self._bytes
+
+    def seconds(self) -> float:
+        return self._seconds
+
+    def files_per_second(self) -> float:
+        done = self._num_ok + len(self._errors)
+        return done / self._seconds if self._seconds else 0.0
+
+    def mb_per_second(self) -> float:
+        return self._bytes / 1e6 / self._seconds if self._seconds else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "ok": self._num_ok,
+            "skipped": self._num_skipped,
+            "errors": len(self._errors),
+            "bytes": self._bytes,
+            "seconds": self._seconds,
+            "files_per_second": self.files_per_second(),
+            "mb_per_second": self.mb_per_second(),
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"IngestReport(ok: {self._num_ok}, skipped: {self._num_skipped}, "
+            f"errors: {len(self._errors)}, "
+            f"{self.files_per_second():.1f} files/s, "
+            f"{self.mb_per_second():.1f} MB/s)"
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+# NOTE: The checkpoint is a json line per finished file, flushed as soon as
+# the file is done. A line cut short by an interruption is ignored.
+def read_checkpoint(path: PathLike) -> dict[str, dict]:
+    done = dict()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            done[record["path"]] = record
+    return done
+
+
+# NOTE: Runs in a worker process, see load_many_json_stats.
+def _load(path: str, index: dict) -> tuple[bytes, int]:
+    return dumps_run(load_json_stats(path, index)), os.path.getsize(path)
+
+
+def bulk_ingest(
+    paths: Sequence[PathLike],
+    indices: Union[Sequence[dict], Callable[[str], dict]],
+    sink: Optional[Callable[[Run], None]] = None,
+    checkpoint: Optional[PathLike] = None,
+    retry_failed: bool = False,
+    max_workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+    progress_interval: float = 1.0,
+) -> IngestReport:
+    paths = [os.fspath(path) for path in paths]
+    if callable(indices):
+        indices = [indices(path) for path in paths]
+    if len(paths) != len(indices):
+        raise ValueError("paths and indices should have the same length.")
+
+    report = IngestReport()
+    done = dict() if checkpoint is None else read_checkpoint(checkpoint)
+    todo = []
+    for path, index in zip(paths, indices):
+        record = done.get(path, None)
+        if record is not None and (
+            record["status"] == "ok" or not retry_failed
+        ):
+            report._num_skipped += 1
+            continue
+        todo.append((path, index))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    # NOTE: Not a with block, its exit would wait for every queued file
+    # before an interrupt could cancel them.
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=get_context("spawn")
+    )
+    checkpoint_file = None if checkpoint is None else open(checkpoint, "a")
+    # NOTE: Only max_pending files are in flight so that a large load does
+    # not keep every parsed file in memory waiting for the sink.
+    max_pending = max_pending or 2 * max_workers
+    start = perf_counter()
+    last_progress = start
+
+    def _record(path: str, error: Optional[str]) -> None:
+        if error is None:
+            report._num_ok += 1
+        else:
+            report._errors.append((path, error))
+        if checkpoint_file is not None:
+            checkpoint_file.write(
+                json.dumps(
+                    {
+                        "path": path,
+                        "status": "ok" if error is None else "error",
+                        "error": error,
+                    }
+                )
+                + "\n"
+            )
+            checkpoint_file.flush()
+
+    try:
+        pending = dict()
+        todo = iter(todo)
+        while True:
+            for path, index in todo:
+                pending[executor.submit(_load, path, index)] = path
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    data, size = future.result()
+                    run = loads_run(data)
+                    # NOTE: The sink runs on this thread, so it does
+                    # not need to be thread-safe.
+                    if sink is None:
+                        report._runs.append(run)
+                    else:
+                        sink(run)
+                    report._bytes += size
+                    _record(path, None)
+                except Exception as error:
+                    _record(path, f"{type(error).__name__}: {error}")
+            report._seconds = perf_counter() - start
+            if (
+                progress is not None
+                and perf_counter() - last_progress >= progress_interval
+            ):
+                last_progress = perf_counter()
+                progress(dict(report.summary(), total=len(paths)))
+    except BaseException:
+        # NOTE: Queued files are dropped, everything finished so far is in
+        # the checkpoint already.
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        executor.shutdown()
+    finally:
+        report._seconds = perf_counter() - start
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+    if progress is not None:
+        progress(dict(report.summary(), total=len(paths)))
+    return report
+
+
+def _print_progress(summary: dict) -> None:
+    print(
+        f"{summary['ok'] + summary['errors'] + summary['skipped']}"
+        f"/{summary['total']} files, {summary['errors']} errors, "
+        f"{summary['files_per_second']:.1f} files/s, "
+        f"{summary['mb_per_second']:.1f} MB/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    from .warehouse import StatWarehouse
+
+    parser = ArgumentParser()
+    parser.add_argument(
+        "manifest",
+        help="json file with a list of {'path': ..., 'index': {...}}.",
+    )
+    parser.add_argument("warehouse")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--errors", default=None, help="Write errors here.")
+    args = parser.parse_args()
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    with StatWarehouse(args.warehouse) as warehouse:
+        report = bulk_ingest(
+            [entry["path"] for entry in manifest],
+            [entry["index"] for entry in manifest],
+            sink=lambda run: warehouse.ingest([run]),
+            checkpoint=args.checkpoint,
+            retry_failed=args.retry_failed,
+            max_workers=args.workers,
+            progress=_print_progress,
+        )
+    print(report)
+    if args.errors is not None:
+        with open(args.errors, "w") as f:
+            json.dump(report.errors(), f, indent=2)
@@ -0,0 +1,276 @@
+import json
+import os
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+from warnings import warn
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .base_types import Node, Stat
+from .run import Run
+from .stats import Distribution, Scalar
+from .util import to_float
+
+PathLike = Union[str, os.PathLike]
+
+_version = 1
+_meta_file = "meta.json"
+_scalars_file = "scalars.npy"
+_bins_file = "bins.npy"
+_geometry_file = "geometry.npy"
+
+
+# NOTE: Columns are grouped by stat so that every parent of one stat ends up
+# in one contiguous block of the file.
+def _build_layout(runs: Sequence[Run]) -> tuple[dict, dict]:
+    scalars = dict()
+    distributions = dict()
+    for run in runs:
+        for name, stat in run.stats().items():
+            if isinstance(stat, Scalar):
+                paths = scalars.setdefault(name, dict())
+                for parent in stat.parents():
+                    paths.setdefault(parent.path(), parent.name())
+            elif isinstance(stat, Distribution):
+                paths = distributions.setdefault(name, dict())
+                for parent, buckets in stat.value().items():
+                    _, num_bins = paths.get(parent.path(), (None, 0))
+                    paths[parent.path()] = (
+                        parent.name(),
+                        max(num_bins, len(buckets)),
+                    )
+            else:
+                warn(f"Skipping {name} with type {type(stat)}")
+    return scalars, distributions
+
+
+def write_columnar(path: PathLike, runs: Sequence[Run]) -> None:
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    num_runs = len(runs)
+    scalar_layout, distribution_layout = _build_layout(runs)
+
+    scalar_columns = []
+    scalar_ids = dict()
+    for name, paths in scalar_layout.items():
+        for node_path, node_name in paths.items():
+            scalar_ids[(name, node_path)] = len(scalar_columns)
+            scalar_columns.append([name, node_path, node_name])
+
+    distribution_columns = []
+    distribution_ids = dict()
+    offset = 0
+    for name, paths in distribution_layout.items():
+        for node_path, (node_name, num_bins) in paths.items():
+            distribution_ids[(name, node_path)] = len(distribution_columns)
+            distribution_columns.append(
+                [name, node_path, node_name, offset, num_bins]
+            )
+            offset += num_runs * num_bins
+
+    scalars = open_memmap(
+        path / _scalars_file,
+        mode="w+",
+        dtype=np.float64,
+        shape=(len(scalar_columns), num_runs),
+    )
+    scalars[:] = np.nan
+    bins = open_memmap(
+        path / _bins_file, mode="w+", dtype=np.float64, shape=(offset,)
+    )
+    bins[:] = 0
+    geometry = open_memmap(
+        path / _geometry_file,
+        mode="w+",
+        dtype=np.float64,
+        shape=(len(distribution_columns), num_runs, 3),
+    )
+    geometry[:] = np.nan
+
+    for run_id, run in enumerate(runs):
+        for name, stat in run.stats().items():
+            if isinstance(stat, Scalar):
+                items = stat.value().items()
+                columns = [scalar_ids[(name, p.path())] for p, _ in items]
+                scalars[columns, run_id] = [to_float(v) for _, v in items]
+            elif isinstance(stat, Distribution):
+                for parent, buckets in stat.value().items():
+                    if not buckets:
+                        continue
+                    column = distribution_ids[(name, parent.path())]
+                    _, _, _, start, num_bins = distribution_columns[column]
+                    start += run_id * num_bins
+                    bins[start : start + len(buckets)] = [
+                        bucket.freq() for bucket in buckets
+                    ]
+                    geometry[column, run_id] = (
+                        buckets[0].lower_bound(),
+                        buckets[0].size(),
+                        len(buckets),
+                    )
+
+    for array in [scalars, bins, geometry]:
+        array.flush()
+    del scalars, bins, geometry
+
+    with open(path / _meta_file, "w") as meta:
+        json.dump(
+            {
+                "version": _version,
+                "runs": [run.index() for run in runs],
+                "scalars": scalar_columns,
+                "distributions": distribution_columns,
+            },
+            meta,
+        )
+
+
+class ColumnarRuns:
+    def __init__(self, path: PathLike) -> None:
+        path = Path(path)
+        with open(path / _meta_file) as meta_file:
+            meta = json.load(meta_file)
+        if meta["version"] != _version:
+            raise RuntimeError(
+                f"Unsupported columnar format version {meta['version']}."
+            )
+        self._runs = meta["runs"]
+        self._scalars = np.load(path / _scalars_file, mmap_mode="r")
+        self._bins = np.load(path / _bins_file, mmap_mode="r")
+        self._geometry = np.load(path / _geometry_file, mmap_mode="r")
+
+        self._nodes = dict()
+        self._scalar_columns = dict()
+        for column, (name, node_path, node_name) in enumerate(meta["scalars"]):
+            self._node(node_path, node_name)
+            self._scalar_columns.setdefault(name, dict())[node_path] = column
+        self._distribution_columns = dict()
+        for column, entry in enumerate(meta["distributions"]):
+            name, node_path, node_name, offset, num_bins = entry
+            self._node(node_path, node_name)
+            self._distribution_columns.setdefault(name, dict())[node_path] = (
+                column,
+                offset,
+                num_bins,
+            )
+
+    def _node(self, path: str, name: str) -> Node:
+        if path not in self._nodes:
+            self._nodes[path] = Node(name, path)
+        return self._nodes[path]
+
+    def num_runs(self) -> int:
+        return len(self._runs)
+
+    def runs(self) -> List[dict]:
+        return self._runs
+
+    def stat_names(self) -> List[str]:
+        return list(self._scalar_columns.keys()) + list(
+            self._distribution_columns.keys()
+        )
+
+    def paths(self, stat_name: str) -> List[str]:
+        if stat_name in self._scalar_columns:
+            return list(self._scalar_columns[stat_name].keys())
+        if stat_name in self._distribution_columns:
+            return list(self._distribution_columns[stat_name].keys())
+        raise ValueError(f"No stat named {stat_name} in the dataset.")
+
+    def _match(self, columns: dict, path: Optional[str]) -> List[str]:
+        if path is None:
+            return list(columns.keys())
+        return [p for p in columns.keys() if fnmatchcase(p, path)]
+
+    def column(self, stat_name: str, path: str) -> np.ndarray:
+        return self._scalars[self._scalar_columns[stat_name][path]]
+
+    # NOTE: Returns a (parents x runs) read-only view. Columns of one stat are
+    # contiguous on disk so selecting all parents costs one sequential read.
+    def matrix(
+        self, stat_name: str, path: Optional[str] = None
+    ) -> tuple[List[Node], np.ndarray]:
+        if stat_name not in self._scalar_columns:
+            raise ValueError(f"No Scalar named {stat_name} in the dataset.")
+        columns = self._scalar_columns[stat_name]
+        paths = self._match(columns, path)
+        ids = [columns[p] for p in paths]
+        if ids and ids == list(range(ids[0], ids[0] + len(ids))):
+            data = self._scalars[ids[0] : ids[0] + len(ids)]
+        else:
+            data = self._scalars[ids]
+        return [self._nodes[p] for p in paths], data
+
+    # NOTE: (runs x columns) view over every Scalar column, no copy.
+    def scalar_matrix(self) -> tuple[List[tuple[str, str]], np.ndarray]:
+        columns = [None] * len(self._scalars)
+        for name, paths in self._scalar_columns.items():
+            for node_path, column in paths.items():
+                columns[column] = (name, node_path)
+        return columns, self._scalars.T
+
+    def distribution_counts(
+        self, stat_name: str, path: str
+    ) -> tuple[np.ndarray, np.ndarray]:
+        column, offset, num_bins = self._distribution_columns[stat_name][path]
+        counts = self._bins[offset : offset + self.num_runs() * num_bins]
+        return (
+            counts.reshape(self.num_runs(), num_bins),
+            self._geometry[column],
+        )
+
+    def query(
+        self,
+        stat_name: str,
+        path: Optional[str] = None,
+        runs: Optional[List[int]] = None,
+    ) -> List[Stat]:
+        if runs is None:
+            runs = range(self.num_runs())
+        if stat_name in self._scalar_columns:
+            parents, data = self.matrix(stat_name, path)
+            data = np.asarray(data[:, runs])
+            ret = []
+            # NOTE: Missing values are stored as nan and are left out.
+            for i, run_id in enumerate(runs):
+                stat = Scalar(self._runs[run_id], stat_name)
+                values = data[:, i].tolist()
+                stat._set_value(
+                    {
+                        parent: value
+                        for parent, value in zip(parents, values)
+                        if value == value
+                    }
+                )
+                stat._set_parents(list(stat.value().keys()))
+                ret.append(stat)
+            return ret
+
+        if stat_name not in self._distribution_columns:
+            raise ValueError(f"No stat named {stat_name} in the dataset.")
+        columns = self._distribution_columns[stat_name]
+        paths = self._match(columns, path)
+        blocks = {p: self.distribution_counts(stat_name, p) for p in paths}
+        ret = []
+        for run_id in runs:
+            stat = Distribution(self._runs[run_id], stat_name)
+            for p in paths:
+                counts, geometry = blocks[p]
+                min_val, bin_size, num_bins = geometry[run_id].tolist()
+                if min_val != min_val:
+                    continue
+                stat.value()[self._nodes[p]] = [
+                    Distribution.Bucket(
+                        min_val + i * bin_size,
+                        min_val + (i + 1) * bin_size,
+                        freq,
+                    )
+                    for i, freq in enumerate(
+                        counts[run_id, : int(num_bins)].tolist()
+                    )
+                ]
+                stat.parents().append(self._nodes[p])
+            ret.append(stat)
+        return ret
@@ -0,0 +1,327 @@
+import heapq
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .run import Run
+from .stats import Scalar
+from .util import to_float
+
+Feature = tuple[str, str]
+
+
+class Correlation:
+    def __init__(
+        self,
+        feature: Feature,
+        other: Optional[Feature],
+        coefficient: float,
+        num_runs: int,
+    ) -> None:
+        self._feature = feature
+        self._other = other
+        self._coefficient = coefficient
+        self._num_runs = num_runs
+
+    def feature(self) -> Feature:
+        return self._feature
+
+    def other(self) -> Optional[Feature]:
+        return self._other
+
+    def coefficient(self) -> float:
+        return self._coefficient
+
+    def num_runs(self) -> int:
+        return self._num_runs
+
+    def __str__(self) -> str:
+        other = "target" if self._other is None else self._other
+        return (
+            f"Correlation({self._feature} ~ {other}: "
+            f"{self._coefficient:.4f}, runs: {self._num_runs})"
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def _in_subtree(path: str, subtree: Optional[str]) -> bool:
+    return subtree is None or path == subtree or path.startswith(subtree + ".")
+
+
+def scalar_matrix(
+    runs: Sequence[Run],
+    stat_names: Optional[Iterable[str]] = None,
+    subtree: Optional[str] = None,
+) -> tuple[List[Feature], np.ndarray]:
+    stat_names = None if stat_names is None else set(stat_names)
+    columns = dict()
+    cells = []
+    for row, run in enumerate(runs):
+        for name, stat in run.stats().items():
+            if not isinstance(stat, Scalar):
+                continue
+            if stat_names is not None and name not in stat_names:
+                continue
+            for parent, value in stat.value().items():
+                if not _in_subtree(parent.path(), subtree):
+                    continue
+                column = columns.setdefault(
+                    (name, parent.path()), len(columns)
+                )
+                cells.append((row, column, to_float(value)))
+    matrix = np.full((len(runs), len(columns)), np.nan)
+    if cells:
+        rows, cols, values = zip(*cells)
+        matrix[list(rows), list(cols)] = values
+    return list(columns.keys()), matrix
+
+
+# NOTE: Average ranks, 1-based, computed per column over the runs that have
+# a value. nan stays nan. Ties are runs of equal values in the sorted column
+# and all get the mean of their first and last position.
+def rank_columns(matrix: np.ndarray) -> np.ndarray:
+    order = np.argsort(matrix, axis=0, kind="stable")
+    ordered = np.take_along_axis(matrix, order, axis=0)
+    position = np.arange(matrix.shape[0])[:, None]
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    ends = np.ones(ordered.shape, dtype=bool)
+    ends[:-1] = starts[1:]
+    first = np.maximum.accumulate(np.where(starts, position, 0), axis=0)
+    last = np.minimum.accumulate(
+        np.where(ends, position, matrix.shape[0])[::-1], axis=0
+    )[::-1]
+    ordered_ranks = (first + last) / 2 + 1
+    ordered_ranks[np.isnan(ordered)] = np.nan
+    ranks = np.empty(matrix.shape)
+    np.put_along_axis(ranks, order, ordered_ranks, axis=0)
+    return ranks
+
+
+# NOTE: Pearson over the runs where both columns have a value. All sums are
+# matrix products of masked blocks, so a block pair costs a few BLAS calls
+# and (block x block) temporaries. Columns are shifted by their own mean
+# first, otherwise a large offset (cycle counts, ticks) cancels out every
+# digit of the spread in the one-pass sums.
+def _block_correlation(
+    left: np.ndarray, right: np.ndarray, min_runs: int
+) -> tuple[np.ndarray, np.ndarray]:
+    left, left_mask = _centered(left)
+    right, right_mask = _centered(right)
+    n = left_mask.T @ right_mask
+    sum_left = left.T @ right_mask
+    sum_right = left_mask.T @ right
+    sum_left_sq = (left * left).T @ right_mask
+    sum_right_sq = left_mask.T @ (right * right)
+    sum_product = left.T @ right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_product - sum_left * sum_right / n
+        left_var = sum_left_sq - sum_left * sum_left / n
+        right_var = sum_right_sq - sum_right * sum_right / n
+        coefficient = covariance / np.sqrt(left_var * right_var)
+    # NOTE: Constant columns have no variance and would only add round-off
+    # noise, they are reported as nan.
+    coefficient[
+        (n < min_runs)
+        | (left_var <= 1e-12 * sum_left_sq)
+        | (right_var <= 1e-12 * sum_right_sq)
+    ] = np.nan
+    return np.clip(coefficient, -1, 1), n
+
+
+def _centered(block: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    mask = ~np.isnan(block)
+    values = np.where(mask, block, 0.0)
+    mean = values.sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+    return np.where(mask, values - mean, 0.0), mask.astype(np.float64)
+
+
+# NOTE: Spearman needs both columns ranked over the runs where both have a
+# value. Ranks over each column's own runs are right for every pair whose
+# columns are missing in the same runs (all pairs, without missing data), so
+# only the other pairs are ranked again. Columns missing in the same runs
+# (usually a whole SimObject missing from some runs) share their joint runs,
+# those are ranked per pair of missing patterns, otherwise per left column.
+def _block_rank_correlation(
+    left: np.ndarray, right: np.ndarray, min_runs: int
+) -> tuple[np.ndarray, np.ndarray]:
+    coefficient, n = _block_correlation(
+        rank_columns(left), rank_columns(right), min_runs
+    )
+    partial = (n < (~np.isnan(left)).sum(axis=0)[:, None]) | (
+        n < (~np.isnan(right)).sum(axis=0)[None, :]
+    )
+    rows = np.flatnonzero(partial.any(axis=1))
+    columns = np.flatnonzero(partial.any(axis=0))
+    left_groups = _mask_groups(left[:, rows])
+    right_groups = _mask_groups(right[:, columns])
+    if len(left_groups) * len(right_groups) > len(rows):
+        for row in rows:
+            others = np.flatnonzero(partial[row])
+            coefficient[row, others] = _paired_rank_correlation(
+                left[:, row], right[:, others], min_runs
+            )
+        return coefficient, n
+    for left_runs, left_columns in left_groups:
+        for right_runs, right_columns in right_groups:
+            runs = np.flatnonzero(left_runs & right_runs)
+            if len(runs) < min_runs:
+                continue
+            first = rows[left_columns]
+            second = columns[right_columns]
+            coefficient[np.ix_(first, second)], _ = _block_correlation(
+                rank_columns(left[np.ix_(runs, first)]),
+                rank_columns(right[np.ix_(runs, second)]),
+                min_runs,
+            )
+    return coefficient, n
+
+
+# NOTE: (runs, columns) per distinct pattern of missing runs in a block.
+def _mask_groups(block: np.ndarray) -> List[tuple[np.ndarray, np.ndarray]]:
+    if block.shape[1] == 0:
+        return []
+    patterns, inverse = np.unique(
+        ~np.isnan(block), axis=1, return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    return [
+        (patterns[:, group], np.flatnonzero(inverse == group))
+        for group in range(patterns.shape[1])
+    ]
+
+
+def _paired_rank_correlation(
+    values: np.ndarray, block: np.ndarray, min_runs: int
+) -> np.ndarray:
+    joint = ~np.isnan(block) & ~np.isnan(values)[:, None]
+    n = joint.sum(axis=0)
+    # NOTE: Ranks over n runs average to (n + 1) / 2, centering is exact.
+    middle = (n + 1) / 2
+    left = np.where(
+        joint,
+        rank_columns(np.where(joint, values[:, None], np.nan)) - middle,
+        0.0,
+    )
+    right = np.where(
+        joint, rank_columns(np.where(joint, block, np.nan)) - middle, 0.0
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coefficient = (left * right).sum(axis=0) / np.sqrt(
+            (left * left).sum(axis=0) * (right * right).sum(axis=0)
+        )
+    coefficient[(n < min_runs) | ~np.isfinite(coefficient)] = np.nan
+    return np.clip(coefficient, -1, 1)
+
+
+_methods = {"pearson": _block_correlation, "rank": _block_rank_correlation}
+
+
+def _prepare(matrix: np.ndarray, method: str) -> np.ndarray:
+    if method not in _methods:
+        raise ValueError(f"method should be one of {list(_methods)}.")
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.ndim != 2:
+        raise ValueError("matrix should be (runs x features).")
+    return matrix
+
+
+def _push(heap: list, k: int, entry: tuple) -> None:
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def correlate(
+    features: List[Feature],
+    matrix: np.ndarray,
+    target: Union[Feature, np.ndarray],
+    method: str = "pearson",
+    k: int = 20,
+    block_size: int = 4096,
+    min_runs: int = 3,
+) -> List[Correlation]:
+    matrix = _prepare(matrix, method)
+    skip = None
+    if isinstance(target, tuple):
+        skip = features.index(target)
+        target = matrix[:, skip]
+    else:
+        target = np.asarray(target, dtype=np.float64)
+    if len(target) != matrix.shape[0]:
+        raise ValueError("target should have one value per run.")
+
+    heap = []
+    for start in range(0, matrix.shape[1], block_size):
+        block = matrix[:, start : start + block_size]
+        coefficient, n = _methods[method](target[:, None], block, min_runs)
+        for offset in np.flatnonzero(~np.isnan(coefficient[0])):
+            column = start + offset
+            if column == skip:
+                continue
+            _push(
+                heap,
+                k,
+                (
+                    abs(coefficient[0, offset]),
+                    -column,
+                    float(coefficient[0, offset]),
+                    int(n[0, offset]),
+                ),
+            )
+    return [
+        Correlation(features[-negative_column], None, value, num_runs)
+        for _, negative_column, value, num_runs in sorted(heap, reverse=True)
+    ]
+
+
+def correlate_pairs(
+    features: List[Feature],
+    matrix: np.ndarray,
+    method: str = "pearson",
+    k: int = 20,
+    block_size: int = 1024,
+    min_runs: int = 3,
+) -> List[Correlation]:
+    matrix = _prepare(matrix, method)
+    num_features = matrix.shape[1]
+    heap = []
+    for left_start in range(0, num_features, block_size):
+        left = matrix[:, left_start : left_start + block_size]
+        for right_start in range(left_start, num_features, block_size):
+            right = matrix[:, right_start : right_start + block_size]
+            coefficient, n = _methods[method](left, right, min_runs)
+            if right_start == left_start:
+                # NOTE: Only pairs above the diagonal, every pair once.
+                coefficient[np.tril_indices_from(coefficient)] = np.nan
+            strength = np.abs(coefficient)
+            strength[np.isnan(strength)] = -1
+            # NOTE: Only the k strongest of a block can make it into the
+            # overall top k.
+            flat = strength.ravel()
+            if len(flat) > k:
+                candidates = np.argpartition(flat, -k)[-k:]
+            else:
+                candidates = np.arange(len(flat))
+            for cell in candidates:
+                if flat[cell] < 0:
+                    continue
+                row, col = divmod(int(cell), strength.shape[1])
+                _push(
+                    heap,
+                    k,
+                    (
+                        float(flat[cell]),
+                        -(left_start + row),
+                        -(right_start + col),
+                        float(coefficient[row, col]),
+                        int(n[row, col]),
+                    ),
+                )
+    return [
+        Correlation(features[-first], features[-second], value, num_runs)
+        for _, first, second, value, num_runs in sorted(heap, reverse=True)
+    ]
@@ -0,0 +1,532 @@
+import json
+import operator
+import os
+import socket
+import socketserver
+import struct
+from array import array
+from fnmatch import fnmatchcase
+from stat import S_ISSOCK
+from threading import RLock, Thread
+from typing import Any, List, Optional, Sequence, Union
+
+from .aggregators import (
+    ArithmeticMeanAggregator,
+    CombineAggregator,
+    GeometricMeanAggregator,
+    MaxAggregator,
+    MinAggregator,
+    SummationAggregator,
+)
+from .base_types import AggregatorNode, Node, Stat
+from .loaders import load_many_json_stats
+from .registry import RunRegistry
+from .run import Run
+from .stats import Distribution, Scalar
+from .util import to_float
+
+PathLike = Union[str, os.PathLike]
+
+_aggregators = {
+    aggregator().name(): aggregator
+    for aggregator in [
+        SummationAggregator,
+        ArithmeticMeanAggregator,
+        GeometricMeanAggregator,
+        MinAggregator,
+        MaxAggregator,
+        CombineAggregator,
+    ]
+}
+
+_operators = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "**": operator.pow,
+    "%": operator.mod,
+}
+
+# NOTE: Every frame is a 4 byte little endian length and a body. Request
+# bodies are json. Response bodies are a status byte, the length of a json
+# header, the header and a payload of doubles:
+#   Scalar: one row per stat and one column per parent, followed by one
+#     byte per cell that is 1 if the parent has a value in that stat.
+#   Distribution: (row, column, min, bin_size, num_bins) per entry,
+#     followed by the counts of every entry.
+_length = struct.Struct("<I")
+_response_head = struct.Struct("<BI")
+_ok = 0
+_error = 1
+
+
+def _encode(header: dict, payload: bytes = b"", status: int = _ok) -> bytes:
+    header = json.dumps(header).encode()
+    return _response_head.pack(status, len(header)) + header + payload
+
+
+def _parents_of(stats: Sequence[Stat]) -> tuple[List[Node], dict]:
+    columns = dict()
+    for stat in stats:
+        for parent in stat.value():
+            columns.setdefault(parent, len(columns))
+    return list(columns.keys()), columns
+
+
+def encode_stats(stats: Sequence[Stat]) -> bytes:
+    if not stats:
+        return _encode({"kind": "Scalar", "stats": [], "parents": []})
+    kind = "Distribution" if isinstance(stats[0], Distribution) else "Scalar"
+    if any(
+        isinstance(stat, Distribution) != (kind == "Distribution")
+        for stat in stats
+    ):
+        raise ValueError("Scalar and Distribution stats can not be mixed.")
+    parents, columns = _parents_of(stats)
+    header = {
+        "kind": kind,
+        "stats": [[stat.index(), stat.name()] for stat in stats],
+        "parents": [[parent.path(), parent.name()] for parent in parents],
+    }
+    if kind == "Scalar":
+        values = array("d", [float("nan")]) * (len(stats) * len(parents))
+        present = bytearray(len(stats) * len(parents))
+        for row, stat in enumerate(stats):
+            for parent, value in stat.value().items():
+                cell = row * len(parents) + columns[parent]
+                values[cell] = to_float(value)
+                present[cell] = 1
+        return _encode(header, values.tobytes() + bytes(present))
+
+    geometry = array("d")
+    counts = array("d")
+    for row, stat in enumerate(stats):
+        for parent, buckets in stat.value().items():
+            geometry.extend(
+                [
+                    row,
+                    columns[parent],
+                    buckets[0].lower_bound() if buckets else 0,
+                    buckets[0].size() if buckets else 0,
+                    len(buckets),
+                ]
+            )
+            counts.extend(bucket.freq() for bucket in buckets)
+    header["entries"] = len(geometry) // 5
+    return _encode(header, geometry.tobytes() + counts.tobytes())
+
+
+class _NodeCache:
+    def __init__(self) -> None:
+        self._nodes = {
+            aggregator().path(): aggregator()
+            for aggregator in _aggregators.values()
+        }
+
+    def node(self, path: str, name: str) -> Node:
+        if path not in self._nodes:
+            self._nodes[path] = Node(name, path)
+        return self._nodes[path]
+
+
+def decode_response(body: bytes, nodes: Optional[_NodeCache] = None) -> Any:
+    status, header_length = _response_head.unpack_from(body)
+    start = _response_head.size
+    header = json.loads(body[start : start + header_length])
+    payload = memoryview(body)[start + header_length :]
+    if status != _ok:
+        raise RuntimeError(header["error"])
+    if "result" in header:
+        return header["result"]
+
+    nodes = nodes or _NodeCache()
+    parents = [nodes.node(path, name) for path, name in header["parents"]]
+    kind = Scalar if header["kind"] == "Scalar" else Distribution
+    stats = [kind(index, name) for index, name in header["stats"]]
+    if kind is Scalar:
+        num_cells = len(stats) * len(parents)
+        values = array("d")
+        values.frombytes(payload[: 8 * num_cells])
+        present = payload[8 * num_cells :]
+        for row, stat in enumerate(stats):
+            for column, parent in enumerate(parents):
+                cell = row * len(parents) + column
+                if present[cell]:
+                    stat.value()[parent] = values[cell]
+    else:
+        geometry = array("d")
+        geometry.frombytes(payload[: 8 * 5 * header["entries"]])
+        counts = array("d")
+        counts.frombytes(payload[8 * 5 * header["entries"] :])
+        offset = 0
+        for entry in range(header["entries"]):
+            row, column, min_val, bin_size, num_bins = geometry[
+                5 * entry : 5 * entry + 5
+            ]
+            num_bins = int(num_bins)
+            stats[int(row)].value()[parents[int(column)]] = [
+                Distribution.Bucket(
+                    min_val + i * bin_size,
+                    min_val + (i + 1) * bin_size,
+                    counts[offset + i],
+                )
+                for i in range(num_bins)
+            ]
+            offset += num_bins
+    for stat in stats:
+        stat._set_parents(list(stat.value().keys()))
+    return stats
+
+
+def _filter_path(stat: Stat, path: Optional[str]) -> Stat:
+    if path is None:
+        return stat
+    new_value = {
+        parent: value
+        for parent, value in stat.value().items()
+        if fnmatchcase(parent.path(), path)
+    }
+    to_ret = type(stat)(stat.index(), stat.name())
+    to_ret._set_value(new_value)
+    to_ret._set_parents(list(new_value.keys()))
+    return to_ret
+
+
+class StatService:
+    def __init__(self, runs: Sequence[Run] = ()) -> None:
+        self._registry = RunRegistry(runs)
+        # NOTE: Runs may be added while the daemon is serving queries.
+        self._lock = RLock()
+
+    def registry(self) -> RunRegistry:
+        return self._registry
+
+    def add(self, run: Run) -> int:
+        with self._lock:
+            return self._registry.add(run)
+
+    def replace(self, run_id: int, run: Run) -> None:
+        with self._lock:
+            self._registry.replace(run_id, run)
+
+    def runs(self) -> List[Run]:
+        with self._lock:
+            return self._registry.runs()
+
+    def __len__(self) -> int:
+        return len(self._registry)
+
+    def load(
+        self,
+        paths: List[PathLike],
+        indices: List[dict],
+        max_workers: Optional[int] = None,
+    ) -> int:
+        runs = load_many_json_stats(paths, indices, max_workers)
+        for run in runs:
+            self.add(run)
+        return len(runs)
+
+    def _stats(self, request: dict) -> List[Stat]:
+        return [
+            _filter_path(stat, request.get("path", None))
+            for stat in self._registry.stats(
+                request["stat"],
+                request.get("where", None),
+                request.get("exclude", None),
+            )
+        ]
+
+    # NOTE: Expressions are nested lists, [operator, left, right], whose
+    # leaves are stat names or numbers, e.g. ["/", "committedInsts",
+    # ["+", "numCycles", 1]].
+    def _evaluate(self, run: Run, expression: Any) -> Union[Stat, float]:
+        if isinstance(expression, str):
+            return run.stat(expression)
+        if isinstance(expression, (int, float)):
+            return expression
+        if not isinstance(expression, list) or len(expression) != 3:
+            raise ValueError(f"Malformed expression {expression}.")
+        symbol, left, right = expression
+        if symbol not in _operators:
+            raise ValueError(f"Unknown operator {symbol}.")
+        return _operators[symbol](
+            self._evaluate(run, left), self._evaluate(run, right)
+        )
+
+    def _names_in(self, expression: Any) -> List[str]:
+        if isinstance(expression, str):
+            return [expression]
+        if isinstance(expression, list):
+            return [
+                name
+                for operand in expression[1:]
+                for name in self._names_in(operand)
+            ]
+        return []
+
+    def _handle(self, request: dict) -> bytes:
+        op = request.get("op", None)
+        if op == "runs":
+            return _encode(
+                {
+                    "result": [
+                        run.index()
+                        for run in self._registry.filter(
+                            request.get("where", None),
+                            request.get("exclude", None),
+                        )
+                    ]
+                }
+            )
+        if op == "stat_names":
+            names = dict()
+            for run in self._registry.runs():
+                names.update(dict.fromkeys(run.names()))
+            return _encode({"result": list(names.keys())})
+        if op == "query":
+            return encode_stats(self._stats(request))
+        if op == "aggregate":
+            if request["aggregator"] not in _aggregators:
+                raise ValueError(
+                    "aggregator should be one of "
+                    f"{list(_aggregators.keys())}."
+                )
+            aggregator = _aggregators[request["aggregator"]]()
+            return encode_stats(
+                [
+                    stat.aggregate_using(aggregator)
+                    for stat in self._stats(request)
+                ]
+            )
+        if op == "evaluate":
+            expression = request["expression"]
+            names = self._names_in(expression)
+            if not names:
+                raise ValueError("expression should use at least one stat.")
+            return encode_stats(
+                [
+                    _filter_path(
+                        self._evaluate(run, expression), request.get("path")
+                    )
+                    for run in self._registry.filter(
+                        request.get("where", None),
+                        request.get("exclude", None),
+                    )
+                    if all(name in run for name in names)
+                ]
+            )
+        raise ValueError(f"Unknown op {op}.")
+
+    def handle(self, request: dict) -> bytes:
+        try:
+            with self._lock:
+                return self._handle(request)
+        # NOTE: Any failure, e.g. ZeroDivisionError from ["%", "ipc", 0], is
+        # answered with an error frame so it does not drop the connection.
+        except Exception as error:
+            return _encode(
+                {"error": f"{type(error).__name__}: {error}"}, status=_error
+            )
+
+
+def _read_frame(stream) -> Optional[bytes]:
+    head = stream.read(_length.size)
+    if len(head) < _length.size:
+        return None
+    (length,) = _length.unpack(head)
+    return stream.read(length)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        while True:
+            body = _read_frame(self.rfile)
+            if body is None:
+                return
+            try:
+                response = self.server.service.handle(json.loads(body))
+            except Exception as error:
+                response = _encode(
+                    {"error": f"{type(error).__name__}: {error}"},
+                    status=_error,
+                )
+            self.wfile.write(_length.pack(len(response)) + response)
+            self.wfile.flush()
+
+
+# NOTE: Only a stale socket is removed, anything else at path is an error.
+def _remove_socket(path: str) -> None:
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not S_ISSOCK(mode):
+        raise RuntimeError(f"{path} exists and is not a socket.")
+    os.remove(path)
+
+
+class StatDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: PathLike, service: StatService) -> None:
+        self._path = os.fspath(path)
+        _remove_socket(self._path)
+        self.service = service
+        super().__init__(self._path, _Handler)
+        self._thread = None
+
+    def path(self) -> str:
+        return self._path
+
+    def start(self) -> "StatDaemon":
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        _remove_socket(self._path)
+
+
+class _ClientBase:
+    def __init__(self) -> None:
+        self._nodes = _NodeCache()
+
+    def _send(self, request: dict) -> bytes:
+        raise NotImplementedError
+
+    def _request(self, request: dict) -> Any:
+        return decode_response(self._send(request), self._nodes)
+
+    def runs(
+        self, where: Optional[dict] = None, exclude: Optional[dict] = None
+    ) -> List[dict]:
+        return self._request(
+            {"op": "runs", "where": where, "exclude": exclude}
+        )
+
+    def stat_names(self) -> List[str]:
+        return self._request({"op": "stat_names"})
+
+    def query(
+        self,
+        stat_name: str,
+        where: Optional[dict] = None,
+        exclude: Optional[dict] = None,
+        path: Optional[str] = None,
+    ) -> List[Stat]:
+        return self._request(
+            {
+                "op": "query",
+                "stat": stat_name,
+                "where": where,
+                "exclude": exclude,
+                "path": path,
+            }
+        )
+
+    def aggregate(
+        self,
+        stat_name: str,
+        aggregator: Union[str, AggregatorNode],
+        where: Optional[dict] = None,
+        exclude: Optional[dict] = None,
+        path: Optional[str] = None,
+    ) -> List[Stat]:
+        if isinstance(aggregator, AggregatorNode):
+            aggregator = aggregator.name()
+        return self._request(
+            {
+                "op": "aggregate",
+                "stat": stat_name,
+                "aggregator": aggregator,
+                "where": where,
+                "exclude": exclude,
+                "path": path,
+            }
+        )
+
+    def evaluate(
+        self,
+        expression: Any,
+        where: Optional[dict] = None,
+        exclude: Optional[dict] = None,
+        path: Optional[str] = None,
+    ) -> List[Scalar]:
+        return self._request(
+            {
+                "op": "evaluate",
+                "expression": expression,
+                "where": where,
+                "exclude": exclude,
+                "path": path,
+            }
+        )
+
+
+class Client(_ClientBase):
+    def __init__(self, path: PathLike) -> None:
+        super().__init__()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(os.fspath(path))
+        self._stream = self._socket.makefile("rb")
+
+    def _send(self, request: dict) -> bytes:
+        body = json.dumps(request).encode()
+        self._socket.sendall(_length.pack(len(body)) + body)
+        response = _read_frame(self._stream)
+        if response is None:
+            raise RuntimeError("The daemon closed the connection.")
+        return response
+
+    def close(self) -> None:
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+# NOTE: Goes through the same encoding as Client but calls the service
+# directly, so it works without a socket.
+class LocalClient(_ClientBase):
+    def __init__(self, service: StatService) -> None:
+        super().__init__()
+        self._service = service
+
+    def _send(self, request: dict) -> bytes:
+        return self._service.handle(json.loads(json.dumps(request)))
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser()
+    parser.add_argument("socket")
+    parser.add_argument(
+        "manifest",
+        help="json file with a list of {'path': ..., 'index': {...}}.",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    service = StatService()
+    service.load(
+        [entry["path"] for entry in manifest],
+        [entry["index"] for entry in manifest],
+        args.workers,
+    )
+    daemon = StatDaemon(args.socket, service)
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.server_close()
+        os.remove(args.socket)
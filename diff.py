@@ -0,0 +1,312 @@
+import heapq
+from math import inf, nan
+from typing import Any, List, Optional
+
+import numpy as np
+
+from .run import Run
+from .stats import Distribution, Scalar
+from .util import to_float
+
+
+class StatChange:
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        type: str,
+        before: Any,
+        after: Any,
+        absolute: float,
+        relative: float,
+        score: float,
+        bucket: str = "changed",
+    ) -> None:
+        self._name = name
+        self._path = path
+        self._type = type
+        self._before = before
+        self._after = after
+        self._absolute = absolute
+        self._relative = relative
+        self._score = score
+        self._bucket = bucket
+
+    def name(self) -> str:
+        return self._name
+
+    def path(self) -> str:
+        return self._path
+
+    def type(self) -> str:
+        return self._type
+
+    def before(self) -> Any:
+        return self._before
+
+    def after(self) -> Any:
+        return self._after
+
+    def absolute(self) -> float:
+        return self._absolute
+
+    def relative(self) -> float:
+        return self._relative
+
+    def score(self) -> float:
+        return self._score
+
+    # NOTE: "changed", "from_zero" (a Scalar that was 0, its relative change
+    # is inf) or "missing" (only in one of the runs).
+    def bucket(self) -> str:
+        return self._bucket
+
+    def __str__(self) -> str:
+        return (
+            f"StatChange({self._name} @ {self._path}: {self._before} -> "
+            f"{self._after}, absolute: {self._absolute}, "
+            f"relative: {self._relative})"
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def _in_subtree(path: str, subtree: Optional[str]) -> bool:
+    return subtree is None or path == subtree or path.startswith(subtree + ".")
+
+
+def _flatten(
+    run: Run, stat_type: type, subtree: Optional[str]
+) -> dict[tuple[str, str], Any]:
+    return {
+        (name, parent.path()): value
+        for name, stat in run.stats().items()
+        if isinstance(stat, stat_type)
+        for parent, value in stat.value().items()
+        if _in_subtree(parent.path(), subtree)
+    }
+
+
+# NOTE: Indices of the k largest scores, largest first, -inf never counts.
+def _top(score: np.ndarray, k: int) -> np.ndarray:
+    # NOTE: argpartition narrows 30k candidates down to k in linear time,
+    # only those k are sorted and turned into objects.
+    if len(score) > k:
+        top = np.argpartition(score, -k)[-k:]
+    else:
+        top = np.arange(len(score))
+    top = top[np.argsort(-score[top], kind="stable")]
+    return top[score[top] > -inf]
+
+
+def _scalar_changes(
+    before: dict, after: dict, k: int, key: str
+) -> List[StatChange]:
+    keys = [key_ for key_ in before if key_ in after]
+    if not keys:
+        return []
+    old = np.fromiter(
+        (to_float(before[key_]) for key_ in keys),
+        dtype=np.float64,
+        count=len(keys),
+    )
+    new = np.fromiter(
+        (to_float(after[key_]) for key_ in keys),
+        dtype=np.float64,
+        count=len(keys),
+    )
+    absolute = new - old
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(absolute == 0, 0.0, absolute / np.abs(old))
+    score = np.abs(relative if key == "relative" else absolute)
+    score[np.isnan(score) | (absolute == 0)] = -inf
+    # NOTE: Changes from 0 have an infinite relative change, they are ranked
+    # by their absolute change in a bucket of their own.
+    from_zero = (old == 0) & (absolute != 0) & ~np.isnan(absolute)
+    from_zero_score = np.where(from_zero, np.abs(absolute), -inf)
+    score[from_zero] = -inf
+    return [
+        StatChange(
+            keys[i][0],
+            keys[i][1],
+            "Scalar",
+            before[keys[i]],
+            after[keys[i]],
+            float(absolute[i]),
+            float(relative[i]),
+            float(scores[i]),
+            bucket,
+        )
+        for bucket, scores in [
+            ("changed", score),
+            ("from_zero", from_zero_score),
+        ]
+        for i in _top(scores, k)
+    ]
+
+
+def _cdf(buckets: List, grid: np.ndarray) -> np.ndarray:
+    edges = np.array(
+        [bucket.lower_bound() for bucket in buckets]
+        + [buckets[-1].upper_bound()],
+        dtype=np.float64,
+    )
+    cumulative = np.concatenate(
+        [[0.0], np.cumsum([bucket.freq() for bucket in buckets])]
+    )
+    if cumulative[-1] > 0:
+        cumulative /= cumulative[-1]
+    # NOTE: Samples are assumed to be spread uniformly within each bin.
+    return np.interp(grid, edges, cumulative)
+
+
+def _mean(buckets: List) -> float:
+    total = sum(bucket.freq() for bucket in buckets)
+    if not total:
+        return float("nan")
+    return (
+        sum(
+            bucket.freq() * (bucket.lower_bound() + bucket.upper_bound()) / 2
+            for bucket in buckets
+        )
+        / total
+    )
+
+
+def _emd(old: np.ndarray, new: np.ndarray, grid: np.ndarray) -> float:
+    gap = np.abs(new - old)
+    return float(((gap[1:] + gap[:-1]) / 2 * np.diff(grid)).sum())
+
+
+def _ks(old: np.ndarray, new: np.ndarray, grid: np.ndarray) -> float:
+    return float(np.max(np.abs(new - old)))
+
+
+def _total_variation(
+    old: np.ndarray, new: np.ndarray, grid: np.ndarray
+) -> float:
+    return float(np.abs(np.diff(new) - np.diff(old)).sum() / 2)
+
+
+_distances = {
+    "emd": _emd,
+    "ks": _ks,
+    "total_variation": _total_variation,
+}
+
+
+def distribution_distance(
+    before: List, after: List, metric: str = "ks"
+) -> float:
+    if metric not in _distances:
+        raise ValueError(f"metric should be one of {list(_distances.keys())}.")
+    if not before or not after:
+        return float("nan")
+    grid = np.union1d(
+        [bucket.lower_bound() for bucket in before + after],
+        [before[-1].upper_bound(), after[-1].upper_bound()],
+    )
+    return _distances[metric](_cdf(before, grid), _cdf(after, grid), grid)
+
+
+def _distribution_changes(
+    before: dict, after: dict, k: int, metric: str
+) -> List[StatChange]:
+    ret = []
+    for key_, old in before.items():
+        if key_ not in after:
+            continue
+        new = after[key_]
+        distance = distribution_distance(old, new, metric)
+        if np.isnan(distance) or distance == 0:
+            continue
+        old_mean, new_mean = _mean(old), _mean(new)
+        absolute = new_mean - old_mean
+        if absolute == 0:
+            relative = 0.0
+        elif old_mean == 0:
+            relative = inf
+        else:
+            relative = absolute / abs(old_mean)
+        ret.append(
+            StatChange(
+                key_[0],
+                key_[1],
+                "Distribution",
+                old_mean,
+                new_mean,
+                absolute,
+                relative,
+                distance,
+            )
+        )
+    return heapq.nlargest(k, ret, key=lambda change: change.score())
+
+
+def _missing_changes(
+    before: dict, after: dict, k: int, type: str
+) -> List[StatChange]:
+    return [
+        StatChange(
+            name,
+            path,
+            type,
+            before.get((name, path), None),
+            after.get((name, path), None),
+            nan,
+            nan,
+            nan,
+            "missing",
+        )
+        for name, path in sorted(before.keys() ^ after.keys())[:k]
+    ]
+
+
+_stat_types = {"Scalar": Scalar, "Distribution": Distribution}
+
+
+# NOTE: Scalars are ranked by |absolute| or |relative| change and
+# Distributions by the distance between their CDFs. The scores do not
+# compare across types, so every stat type and bucket (see
+# StatChange.bucket) is ranked on its own and the result maps
+# (type, bucket), e.g. ("Scalar", "from_zero"), to its top k changes. Stats
+# that did not change are never reported.
+def diff_runs(
+    before: Run,
+    after: Run,
+    k: int = 20,
+    key: str = "relative",
+    subtree: Optional[str] = None,
+    stat_type: Optional[str] = None,
+    metric: str = "ks",
+    include_missing: bool = False,
+) -> dict[tuple[str, str], List[StatChange]]:
+    if key not in ["relative", "absolute"]:
+        raise ValueError("key should be either relative or absolute.")
+    if stat_type is not None and stat_type not in _stat_types:
+        raise ValueError(
+            f"stat_type should be one of {list(_stat_types.keys())}."
+        )
+    if metric not in _distances:
+        raise ValueError(f"metric should be one of {list(_distances.keys())}.")
+    ret = dict()
+    for type_name, type_ in _stat_types.items():
+        if stat_type is not None and stat_type != type_name:
+            continue
+        old = _flatten(before, type_, subtree)
+        new = _flatten(after, type_, subtree)
+        buckets = ["changed"]
+        if type_ is Scalar:
+            buckets.append("from_zero")
+            changes = _scalar_changes(old, new, k, key)
+        else:
+            changes = _distribution_changes(old, new, k, metric)
+        if include_missing:
+            buckets.append("missing")
+            changes += _missing_changes(old, new, k, type_name)
+        for bucket in buckets:
+            ret[(type_name, bucket)] = [
+                change for change in changes if change.bucket() == bucket
+            ]
+    return ret
@@ -0,0 +1,268 @@
+from math import ceil
+from typing import Any, List, Optional
+
+import numpy as np
+from matplotlib import pyplot as plt
+from numpy import atleast_1d
+
+from .markers import get_color_from_id
+from .base_types import Stat
+from .stats import Distribution
+from .util import get_good_dimensions
+
+_to_figure_out = ["hue", "subplot"]
+
+
+def _distribution_arrays(buckets: List) -> tuple[np.ndarray, np.ndarray]:
+    edges = np.fromiter(
+        (bucket.lower_bound() for bucket in buckets),
+        dtype=np.float64,
+        count=len(buckets),
+    )
+    edges = np.append(edges, buckets[-1].upper_bound())
+    counts = np.fromiter(
+        (bucket.freq() for bucket in buckets),
+        dtype=np.float64,
+        count=len(buckets),
+    )
+    return edges, counts
+
+
+# NOTE: Merges runs of adjacent bins so that at most max_bins remain. Counts
+# are summed so the merged histogram is exact.
+def _downsample(
+    edges: np.ndarray, counts: np.ndarray, max_bins: Optional[int]
+) -> tuple[np.ndarray, np.ndarray]:
+    if max_bins is None or len(counts) <= max_bins:
+        return edges, counts
+    step = ceil(len(counts) / max_bins)
+    starts = np.arange(0, len(counts), step)
+    return (
+        np.append(edges[starts], edges[-1]),
+        np.add.reduceat(counts, starts),
+    )
+
+
+# NOTE: Assumes samples are spread uniformly within each bin and
+# interpolates the cumulative counts at the new edges.
+def _rebin(
+    edges: np.ndarray, counts: np.ndarray, new_edges: np.ndarray
+) -> np.ndarray:
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    return np.diff(np.interp(new_edges, edges, cumulative))
+
+
+def _build_series(
+    stats: List[Stat],
+    discriminator_mapping: Optional[dict[str, str]],
+    stat_type: type = Distribution,
+) -> tuple[List[tuple], dict[str, dict[Any, int]], dict[str, str]]:
+    discriminator_mapping = discriminator_mapping or dict()
+    if len(set(discriminator_mapping.values())) != len(discriminator_mapping):
+        raise ValueError(
+            "Provided values in `discriminator_mapping` should be unique."
+        )
+    if not set(discriminator_mapping.values()) <= set(_to_figure_out):
+        raise ValueError(
+            "Provided values in `discriminator_mapping` should be in "
+            f"{_to_figure_out}."
+        )
+    mapping = {value: key for key, value in discriminator_mapping.items()}
+
+    series = []
+    discriminator_map_map = {"hue": dict(), "subplot": dict()}
+    for stat in stats:
+        if not isinstance(stat, stat_type):
+            raise ValueError(
+                f"Only {stat_type.__name__} stats can be plotted."
+            )
+        index = stat.index()
+        for parent, value in stat.value().items():
+            if len(value) == 0:
+                continue
+            labels = [
+                f"{key}: {value}"
+                for key, value in index.items()
+                if key not in discriminator_mapping
+            ]
+            if "parent" not in discriminator_mapping:
+                labels.append(f"parent: {parent}")
+            ids = dict()
+            for discriminator in _to_figure_out:
+                key = mapping.get(discriminator, None)
+                if key is None:
+                    # NOTE: Without a mapping every series gets its own hue
+                    # and every series shares one subplot.
+                    tie = len(series) if discriminator == "hue" else None
+                else:
+                    tie = parent if key == "parent" else index[key]
+                value_to_id = discriminator_map_map[discriminator]
+                ids[discriminator] = value_to_id.setdefault(
+                    tie, len(value_to_id)
+                )
+                if key is not None and discriminator == "hue":
+                    labels.insert(0, f"{key}: {tie}")
+            series.append(
+                (ids["hue"], ids["subplot"], ", ".join(labels), stat, value)
+            )
+    if not series:
+        raise ValueError("No values found in the provided stats.")
+    return series, discriminator_map_map, mapping
+
+
+def _make_axes(
+    num_subplots: int,
+    nrows: Optional[int],
+    ncols: Optional[int],
+    figsize: tuple,
+    **kwargs,
+) -> tuple[plt.figure, List[plt.axes]]:
+    if (nrows is None) != (ncols is None):
+        raise ValueError(
+            "If one of nrows or ncols is provided, both should be provided."
+        )
+    if nrows is None:
+        nrows, ncols = get_good_dimensions(num_subplots)
+    elif nrows * ncols != num_subplots:
+        raise ValueError(
+            "Provided nrows and ncols should multiply to number of unique "
+            f"values for subplot which is {num_subplots}."
+        )
+    fig, axes = plt.subplots(
+        nrows=nrows, ncols=ncols, figsize=figsize, **kwargs
+    )
+    return fig, atleast_1d(axes).flatten()
+
+
+def _set_titles(
+    axes: List[plt.axes], discriminator_map_map: dict, mapping: dict
+) -> None:
+    key = mapping.get("subplot", None)
+    if key is None:
+        return
+    for value, subplot_id in discriminator_map_map["subplot"].items():
+        axes[subplot_id].title.set_text(f"{key}: {value}")
+
+
+# NOTE: A legend only helps to tell more than one series apart, and an axis
+# without labelled series would warn.
+def _add_legends(axes: List[plt.axes]) -> None:
+    for ax in axes:
+        if len(ax.get_legend_handles_labels()[1]) > 1:
+            ax.legend()
+
+
+def plot_histogram(
+    stats: List[Distribution],
+    discriminator_mapping: Optional[dict[str, str]] = None,
+    nrows: Optional[int] = None,
+    ncols: Optional[int] = None,
+    figsize: Optional[tuple[int, int]] = (14, 8.32),
+    density: bool = False,
+    max_bins: Optional[int] = 512,
+    fill: bool = False,
+    **kwargs,
+) -> tuple[plt.figure, List[plt.axes]]:
+    series, discriminator_map_map, mapping = _build_series(
+        stats, discriminator_mapping
+    )
+    fig, axes = _make_axes(
+        len(discriminator_map_map["subplot"]), nrows, ncols, figsize, **kwargs
+    )
+    for hue_id, subplot_id, label, _, buckets in series:
+        edges, counts = _downsample(*_distribution_arrays(buckets), max_bins)
+        if density:
+            total = counts.sum()
+            counts = counts / (total * np.diff(edges)) if total else counts
+        axes[subplot_id].stairs(
+            counts,
+            edges,
+            fill=fill,
+            color=get_color_from_id(hue_id),
+            label=label,
+        )
+    _set_titles(axes, discriminator_map_map, mapping)
+    _add_legends(axes)
+    return fig, axes
+
+
+def plot_cdf(
+    stats: List[Distribution],
+    discriminator_mapping: Optional[dict[str, str]] = None,
+    nrows: Optional[int] = None,
+    ncols: Optional[int] = None,
+    figsize: Optional[tuple[int, int]] = (14, 8.32),
+    max_bins: Optional[int] = 512,
+    **kwargs,
+) -> tuple[plt.figure, List[plt.axes]]:
+    series, discriminator_map_map, mapping = _build_series(
+        stats, discriminator_mapping
+    )
+    fig, axes = _make_axes(
+        len(discriminator_map_map["subplot"]), nrows, ncols, figsize, **kwargs
+    )
+    for hue_id, subplot_id, label, _, buckets in series:
+        edges, counts = _downsample(*_distribution_arrays(buckets), max_bins)
+        cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+        if cumulative[-1]:
+            cumulative /= cumulative[-1]
+        axes[subplot_id].plot(
+            edges, cumulative, color=get_color_from_id(hue_id), label=label
+        )
+    _set_titles(axes, discriminator_map_map, mapping)
+    for ax in axes:
+        ax.set_ylim(0, 1.05)
+    _add_legends(axes)
+    return fig, axes
+
+
+def plot_heatmap(
+    stats: List[Distribution],
+    discriminator_mapping: Optional[dict[str, str]] = None,
+    nrows: Optional[int] = None,
+    ncols: Optional[int] = None,
+    figsize: Optional[tuple[int, int]] = (14, 8.32),
+    density: bool = True,
+    max_bins: int = 512,
+    cmap: str = "viridis",
+    max_labels: int = 64,
+    **kwargs,
+) -> tuple[plt.figure, List[plt.axes]]:
+    if discriminator_mapping is not None and (
+        "hue" in discriminator_mapping.values()
+    ):
+        raise ValueError("A heatmap has one row per series and no `hue`.")
+    series, discriminator_map_map, mapping = _build_series(
+        stats, discriminator_mapping
+    )
+    fig, axes = _make_axes(
+        len(discriminator_map_map["subplot"]), nrows, ncols, figsize, **kwargs
+    )
+    for subplot_id, ax in enumerate(axes):
+        rows = [
+            (label, *_distribution_arrays(buckets))
+            for _, row_subplot_id, label, _, buckets in series
+            if row_subplot_id == subplot_id
+        ]
+        if not rows:
+            continue
+        # NOTE: Every row is rebinned onto one grid spanning all rows.
+        low = min(edges[0] for _, edges, _ in rows)
+        high = max(edges[-1] for _, edges, _ in rows)
+        num_bins = min(max_bins, max(len(counts) for _, _, counts in rows))
+        grid = np.linspace(low, high, num_bins + 1)
+        matrix = np.vstack(
+            [_rebin(edges, counts, grid) for _, edges, counts in rows]
+        )
+        if density:
+            totals = matrix.sum(axis=1, keepdims=True)
+            np.divide(matrix, totals, out=matrix, where=totals > 0)
+        mesh = ax.pcolormesh(
+            grid, np.arange(len(rows) + 1), matrix, cmap=cmap, shading="flat"
+        )
+        if len(rows) <= max_labels:
+            ax.set_yticks(np.arange(len(rows)) + 0.5)
+            ax.set_yticklabels([label for label, _, _ in rows])
+        fig.colorbar(mesh, ax=ax)
+    _set_titles(axes, discriminator_map_map, mapping)
+    return fig, axes
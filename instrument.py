@@ -0,0 +1,380 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from importlib import import_module
+from inspect import signature
+from threading import Lock, local
+from time import perf_counter
+from typing import Callable, Iterator, List, Optional, Union
+
+from .stats import Distribution
+
+# NOTE: Nothing in the library checks whether instrumentation is on. enable()
+# swaps timing wrappers in for the functions and methods in _targets and
+# disable() puts the originals back, so a disabled build runs unmodified code.
+_enabled = False
+_patches = []
+_phases = dict()
+_counters = dict()
+_lock = Lock()
+_state = local()
+
+
+def _count_nodes(root) -> int:
+    return 1 + sum(_count_nodes(child) for child in root.children())
+
+
+def _count_buckets(stats) -> int:
+    return sum(
+        len(buckets)
+        for stat in stats
+        if isinstance(stat, Distribution)
+        for buckets in stat.value().values()
+    )
+
+
+def _count_compile(arguments: dict, result: dict) -> dict:
+    return {
+        "stats_built": len(result),
+        "nodes_built": _count_nodes(arguments["root"]),
+        "buckets_built": _count_buckets(result.values()),
+    }
+
+
+def _count_load(arguments: dict, result) -> dict:
+    return {
+        "files_read": 1,
+        "bytes_read": os.path.getsize(arguments["path"]),
+    }
+
+
+def _count_operation(arguments: dict, result) -> dict:
+    return {"operations": 1, "values_computed": len(result.value())}
+
+
+def _count_aggregation(arguments: dict, result) -> dict:
+    return {
+        "aggregations": 1,
+        "buckets_aggregated": _count_buckets([result]),
+    }
+
+
+def _count_plot(arguments: dict, result) -> dict:
+    return {
+        "bars_plotted": sum(len(stat.value()) for stat in arguments["stats"])
+    }
+
+
+_operators = [
+    "__add__",
+    "__sub__",
+    "__mul__",
+    "__truediv__",
+    "__floordiv__",
+    "__pow__",
+    "__mod__",
+]
+
+# NOTE: Importing these pulls in matplotlib, so enable() only patches them when
+# they are already imported. Import them first to time plotting.
+_plot_modules = ["barplot", "distplot", "lineplot"]
+
+# NOTE: (module, attribute, phase, counter). Dotted attributes are methods.
+_targets = (
+    [
+        (
+            "json_interface",
+            "compile_json_stats",
+            "tree_building",
+            _count_compile,
+        ),
+        ("loaders", "load_json_stats", "parsing", _count_load),
+    ]
+    + [
+        ("stats", f"Scalar.{operator}", "arithmetic", _count_operation)
+        for operator in _operators
+    ]
+    + [
+        (
+            "aggregators",
+            f"{aggregator}.aggregate",
+            "aggregation",
+            _count_aggregation,
+        )
+        for aggregator in [
+            "SummationAggregator",
+            "ArithmeticMeanAggregator",
+            "GeometricMeanAggregator",
+            "MinAggregator",
+            "MaxAggregator",
+            "CombineAggregator",
+        ]
+    ]
+    + [
+        ("barplot", "plot_bar", "plotting", _count_plot),
+        ("distplot", "plot_histogram", "plotting", None),
+        ("distplot", "plot_cdf", "plotting", None),
+        ("distplot", "plot_heatmap", "plotting", None),
+        ("lineplot", "plot_line", "plotting", None),
+    ]
+)
+
+
+def _stack() -> List[list]:
+    if not hasattr(_state, "stack"):
+        _state.stack = []
+    return _state.stack
+
+
+def _record(name: str, elapsed: float, self_elapsed: float) -> None:
+    with _lock:
+        entry = _phases.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += self_elapsed
+
+
+def count(name: str, amount: int = 1) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    if not _enabled:
+        yield
+        return
+    stack = _stack()
+    # NOTE: Recursive and nested calls of the same phase are folded into
+    # the outermost one.
+    if any(frame[0] == name for frame in stack):
+        yield
+        return
+    frame = [name, 0.0]
+    stack.append(frame)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        _record(name, elapsed, elapsed - frame[1])
+
+
+# NOTE: Counters get the bound arguments by name, so keyword calls count the
+# same as positional ones.
+def _wrap(function: Callable, name: str, counter: Optional[Callable]):
+    bind = signature(function).bind if counter is not None else None
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if any(frame[0] == name for frame in _stack()):
+            return function(*args, **kwargs)
+        with phase(name):
+            result = function(*args, **kwargs)
+        if counter is not None:
+            arguments = bind(*args, **kwargs).arguments
+            for counter_name, amount in counter(arguments, result).items():
+                count(counter_name, amount)
+        return result
+
+    wrapper._instrumented = function
+    return wrapper
+
+
+def _package_modules() -> List:
+    package = __name__.rsplit(".", 1)[0]
+    return [
+        module
+        for module_name, module in list(sys.modules.items())
+        if module is not None
+        and (module_name == package or module_name.startswith(package + "."))
+    ]
+
+
+def _patch(owner, attribute: str, value) -> None:
+    _patches.append((owner, attribute, owner.__dict__[attribute]))
+    setattr(owner, attribute, value)
+
+
+def enable() -> None:
+    global _enabled
+    if _enabled:
+        return
+    package = __name__.rsplit(".", 1)[0]
+    wrapped = []
+    for module_name, attribute, name, counter in _targets:
+        full_name = f"{package}.{module_name}"
+        if module_name in _plot_modules and full_name not in sys.modules:
+            continue
+        owner = import_module(full_name)
+        *owners, attribute = attribute.split(".")
+        for owner_name in owners:
+            owner = getattr(owner, owner_name)
+        wrapped.append(
+            (owner, attribute, _wrap(getattr(owner, attribute), name, counter))
+        )
+    # NOTE: Functions are also rebound in every module of the package that
+    # imported them by name, e.g. loaders importing compile_json_stats.
+    functions = {
+        id(getattr(owner, attribute)): wrapper
+        for owner, attribute, wrapper in wrapped
+        if not isinstance(owner, type)
+    }
+    for module in _package_modules():
+        for attribute, value in list(vars(module).items()):
+            if id(value) in functions:
+                _patch(module, attribute, functions[id(value)])
+    for owner, attribute, wrapper in wrapped:
+        if isinstance(owner, type):
+            _patch(owner, attribute, wrapper)
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    while _patches:
+        owner, attribute, original = _patches.pop()
+        setattr(owner, attribute, original)
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+
+
+@contextmanager
+def instrumented() -> Iterator[None]:
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+
+
+def summary() -> dict:
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "phases": {
+                name: {
+                    "calls": calls,
+                    "seconds": seconds,
+                    "self_seconds": self_seconds,
+                }
+                for name, (calls, seconds, self_seconds) in _phases.items()
+            },
+            "counters": dict(_counters),
+        }
+
+
+def write_summary(path: Union[str, os.PathLike]) -> None:
+    with open(path, "w") as f:
+        json.dump(summary(), f, indent=2)
+
+
+class Capture:
+    def __init__(self, profile: bool, memory: bool) -> None:
+        self._profiler = cProfile.Profile() if profile else None
+        self._memory = memory
+        self._owns_tracemalloc = False
+        self._start_time = None
+        self._seconds = None
+        self._peak_memory = None
+        self._snapshot = None
+
+    def _start(self) -> None:
+        if self._memory:
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._start_time = perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def _stop(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._seconds = perf_counter() - self._start_time
+        if self._memory:
+            _, self._peak_memory = tracemalloc.get_traced_memory()
+            self._snapshot = tracemalloc.take_snapshot()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+
+    def seconds(self) -> Optional[float]:
+        return self._seconds
+
+    def peak_memory(self) -> Optional[int]:
+        return self._peak_memory
+
+    def profile(self) -> Optional[pstats.Stats]:
+        if self._profiler is None:
+            return None
+        return pstats.Stats(self._profiler)
+
+    def dump_profile(self, path: Union[str, os.PathLike]) -> None:
+        if self._profiler is None:
+            raise RuntimeError("This capture did not run the profiler.")
+        self._profiler.dump_stats(path)
+
+    def summary(self, limit: int = 20) -> dict:
+        ret = {"seconds": self._seconds, "peak_memory": self._peak_memory}
+        if self._profiler is not None:
+            entries = sorted(
+                self.profile().stats.items(),
+                key=lambda entry: entry[1][3],
+                reverse=True,
+            )
+            ret["functions"] = [
+                {
+                    "function": f"{filename}:{line}({function})",
+                    "calls": calls,
+                    "seconds": total,
+                    "cumulative_seconds": cumulative,
+                }
+                for (filename, line, function), (
+                    _,
+                    calls,
+                    total,
+                    cumulative,
+                    _,
+                ) in entries[:limit]
+            ]
+        if self._snapshot is not None:
+            ret["allocations"] = [
+                {
+                    "location": str(statistic.traceback),
+                    "bytes": statistic.size,
+                    "count": statistic.count,
+                }
+                for statistic in self._snapshot.statistics("lineno")[:limit]
+            ]
+        return ret
+
+
+@contextmanager
+def capture(profile: bool = True, memory: bool = False) -> Iterator[Capture]:
+    ret = Capture(profile, memory)
+    ret._start()
+    try:
+        yield ret
+    finally:
+        ret._stop()
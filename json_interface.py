@@ -1,12 +1,20 @@
-from typing import List
+from typing import List, Optional
 from warnings import warn
 
 from .base_types import Node
 from .stats import Distribution, Scalar
 
 
+# NOTE: With max_density, every stat whose parents mostly share one value
+# (0, nan, an empty histogram) is compacted into a SparseValue once the whole
+# dump is compiled. It is off by default since the values are then no longer
+# dicts. Nested calls pass None so this only runs at the top.
 def compile_json_stats(
-    index: dict, to_compile: dict, current_build: dict, root: Node
+    index: dict,
+    to_compile: dict,
+    current_build: dict,
+    root: Node,
+    max_density: Optional[float] = None,
 ) -> dict:
     for key, value in to_compile.items():
         # ignore hierarchical stats like vectors
@@ -18,14 +26,14 @@ def compile_json_stats(
                     value["name"], ".".join([root.path(), value["name"]])
                 )
                 root.add_child(node)
-                compile_json_stats(index, value, current_build, node)
+                compile_json_stats(index, value, current_build, node, None)
             elif value.get("type", "otherwise") == "SimObjectVector":
                 for item in value["value"]:
                     node = Node(
                         item["name"], ".".join([root.path(), item["name"]])
                     )
                     root.add_child(node)
-                    compile_json_stats(index, item, current_build, node)
+                    compile_json_stats(index, item, current_build, node, None)
             elif value.get("type", "otherwise") == "Scalar":
                 if key not in current_build:
                     current_build[key] = Scalar(index, key)
@@ -38,6 +46,10 @@ def compile_json_stats(
                 warn(
                     f"Skipping {key} with type {value.get('type', 'otherwise')}"
                 )
+    if max_density is not None:
+        shared_keys = dict()
+        for stat in current_build.values():
+            stat._compact(max_density, shared_keys)
     return current_build
 
 
@@ -0,0 +1,141 @@
+from typing import Callable, List, Optional
+
+import numpy as np
+from matplotlib import pyplot as plt
+
+from .distplot import _add_legends, _build_series, _make_axes, _set_titles
+from .markers import get_color_from_id
+from .timeseries import TimeSeries
+
+
+# NOTE: Keeps the first, last, minimum and maximum point of every bucket in
+# time order. Peaks and dips survive, which is what matters on screen.
+def decimate_minmax(
+    x: np.ndarray, y: np.ndarray, num_buckets: int
+) -> tuple[np.ndarray, np.ndarray]:
+    num_points = len(y)
+    if num_buckets < 1 or num_points <= 4 * num_buckets:
+        return x, y
+    size = -(-num_points // num_buckets)
+    full = (num_points // size) * size
+    blocks = y[:full].reshape(-1, size)
+    starts = np.arange(0, full, size)
+    picks = [
+        starts,
+        starts + blocks.argmin(axis=1),
+        starts + blocks.argmax(axis=1),
+        starts + size - 1,
+    ]
+    if full < num_points:
+        tail = y[full:]
+        picks.append(
+            full + np.array([0, tail.argmin(), tail.argmax(), len(tail) - 1])
+        )
+    indices = np.unique(np.concatenate(picks))
+    return x[indices], y[indices]
+
+
+# NOTE: Largest-triangle-three-buckets. Picks per bucket the point forming the
+# largest triangle with the previous pick and the next bucket's average.
+def decimate_lttb(
+    x: np.ndarray, y: np.ndarray, num_points: int
+) -> tuple[np.ndarray, np.ndarray]:
+    if num_points < 3 or len(y) <= num_points:
+        return x, y
+    edges = np.linspace(1, len(y) - 1, num_points - 1).astype(np.int64)
+    indices = np.empty(num_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = len(y) - 1
+    picked = 0
+    for bucket in range(num_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[end : edges[bucket + 2]].mean()
+            next_y = y[end : edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        areas = np.abs(
+            (x[picked] - next_x) * (y[start:end] - y[picked])
+            - (x[picked] - x[start:end]) * (next_y - y[picked])
+        )
+        picked = start + int(areas.argmax())
+        indices[bucket + 1] = picked
+    return x[indices], y[indices]
+
+
+_decimators = {
+    "minmax": decimate_minmax,
+    "lttb": decimate_lttb,
+}
+
+
+# NOTE: Defaults to one bucket per horizontal pixel of the axes.
+def _budget(ax: plt.axes, max_points: Optional[int]) -> int:
+    if max_points is not None:
+        return max_points
+    return max(1, int(ax.bbox.width))
+
+
+def _connect_redecimation(
+    ax: plt.axes,
+    lines: List[tuple],
+    decimator: Callable,
+    max_points: Optional[int],
+) -> None:
+    def _redecimate(ax: plt.axes) -> None:
+        low, high = ax.get_xlim()
+        for line, x, y in lines:
+            start = max(0, np.searchsorted(x, low, side="left") - 1)
+            end = np.searchsorted(x, high, side="right") + 1
+            line.set_data(
+                *decimator(x[start:end], y[start:end], _budget(ax, max_points))
+            )
+
+    ax.callbacks.connect("xlim_changed", _redecimate)
+
+
+def plot_line(
+    stats: List[TimeSeries],
+    discriminator_mapping: Optional[dict[str, str]] = None,
+    nrows: Optional[int] = None,
+    ncols: Optional[int] = None,
+    figsize: Optional[tuple[int, int]] = (14, 8.32),
+    max_points: Optional[int] = None,
+    decimation: str = "minmax",
+    **kwargs,
+) -> tuple[plt.figure, List[plt.axes]]:
+    if decimation not in _decimators:
+        raise ValueError(
+            f"decimation should be one of {list(_decimators.keys())}."
+        )
+    decimator = _decimators[decimation]
+    series, discriminator_map_map, mapping = _build_series(
+        stats, discriminator_mapping, TimeSeries
+    )
+    fig, axes = _make_axes(
+        len(discriminator_map_map["subplot"]), nrows, ncols, figsize, **kwargs
+    )
+
+    lines = dict()
+    for hue_id, subplot_id, label, stat, y in series:
+        x = stat.times()
+        keep = ~np.isnan(y)
+        if not keep.all():
+            x, y = x[keep], y[keep]
+        ax = axes[subplot_id]
+        (line,) = ax.plot(
+            *decimator(x, y, _budget(ax, max_points)),
+            color=get_color_from_id(hue_id),
+            label=label,
+        )
+        lines.setdefault(subplot_id, []).append((line, x, y))
+
+    # NOTE: Only the decimated points are handed to matplotlib. Zooming in
+    # decimates the visible range of the full series again.
+    for subplot_id, ax_lines in lines.items():
+        _connect_redecimation(
+            axes[subplot_id], ax_lines, decimator, max_points
+        )
+    _set_titles(axes, discriminator_map_map, mapping)
+    _add_legends(axes)
+    return fig, axes
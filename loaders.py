@@ -0,0 +1,188 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import BinaryIO, List, Optional, Union
+
+from .base_types import Node
+from .json_interface import compile_json_stats
+from .memory import SpillingRunCache, dumps_run, loads_run
+from .run import Run
+
+PathLike = Union[str, os.PathLike]
+
+_chunk_size = 1 << 20
+_prefetch_depth = 8
+
+
+def _open_zstd(path: PathLike) -> BinaryIO:
+    try:
+        from compression import zstd
+
+        return zstd.open(path, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            f"Reading {path} requires the `zstandard` package "
+            "(or Python 3.14+)."
+        )
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+
+
+_openers = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".zst": _open_zstd,
+}
+
+
+class _PrefetchReader(io.RawIOBase):
+    def __init__(self, stream: BinaryIO, chunk_size: int, depth: int):
+        super().__init__()
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._queue = Queue(maxsize=depth)
+        self._stop = Event()
+        self._error = None
+        self._buffer = b""
+        self._eof = False
+        self._thread = Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    # NOTE: Runs on the background thread. zlib, bz2 and lzma release the
+    # GIL while decompressing, so this overlaps with the consumer.
+    def _fill(self) -> None:
+        try:
+            while not self._stop.is_set():
+                chunk = self._stream.read(self._chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    break
+        except BaseException as error:
+            self._error = error
+            self._put(b"")
+        finally:
+            self._stream.close()
+
+    def _put(self, chunk: bytes) -> None:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def _next_chunk(self) -> bytes:
+        chunk = self._queue.get()
+        if not chunk:
+            self._eof = True
+            if self._error is not None:
+                raise self._error
+        return chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._buffer and not self._eof:
+            self._buffer = self._next_chunk()
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def readall(self) -> bytes:
+        chunks = [self._buffer]
+        self._buffer = b""
+        while not self._eof:
+            chunks.append(self._next_chunk())
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except Empty:
+                pass
+            self._thread.join()
+        super().close()
+
+
+def open_stats_file(
+    path: PathLike,
+    chunk_size: int = _chunk_size,
+    prefetch_depth: int = _prefetch_depth,
+) -> BinaryIO:
+    opener = _openers.get(Path(path).suffix.lower(), None)
+    if opener is None:
+        return open(path, "rb")
+    return io.BufferedReader(
+        _PrefetchReader(opener(path), chunk_size, prefetch_depth),
+        buffer_size=chunk_size,
+    )
+
+
+def load_json_stats(
+    path: PathLike,
+    index: dict,
+    root: Optional[Node] = None,
+    max_density: Optional[float] = None,
+) -> Run:
+    if root is None:
+        root = Node("root", "")
+    with open_stats_file(path) as stream:
+        to_compile = json.load(stream)
+    stats = compile_json_stats(index, to_compile, dict(), root, max_density)
+    return Run(index, root, stats)
+
+
+def _load_dumped(
+    path: PathLike, index: dict, max_density: Optional[float]
+) -> bytes:
+    return dumps_run(load_json_stats(path, index, max_density=max_density))
+
+
+# NOTE: Parsing and compiling hold the GIL, so files are loaded in worker
+# processes. Runs come back as dumps_run bytes, which are much cheaper to
+# load than the json.
+def load_many_json_stats(
+    paths: List[PathLike],
+    indices: List[dict],
+    max_workers: Optional[int] = None,
+    cache: Optional[SpillingRunCache] = None,
+    max_density: Optional[float] = None,
+) -> List[Run]:
+    if len(paths) != len(indices):
+        raise ValueError("paths and indices should have the same length.")
+    # NOTE: Runs are handed to the cache as they arrive so that the memory
+    # budget holds during the load, not only after it.
+    keep = (lambda run: run) if cache is None else cache.add
+    if max_workers is None:
+        max_workers = min(len(paths), os.cpu_count() or 1)
+    if max_workers == 1 or len(paths) <= 1:
+        return [
+            keep(load_json_stats(path, index, max_density=max_density))
+            for path, index in zip(paths, indices)
+        ]
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=get_context("spawn")
+    ) as executor:
+        return [
+            keep(loads_run(data))
+            for data in executor.map(
+                _load_dumped, paths, indices, [max_density] * len(paths)
+            )
+        ]
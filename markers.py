@@ -1,4 +1,3 @@
-from matplotlib import colors as mcolors
 from typing import List
 
 colors = [
@@ -21,7 +20,11 @@ colors = [
 ]
 
 
+# NOTE: matplotlib is imported on first use so that importing this module
+# does not pull in matplotlib for data-only workloads.
 def get_color_from_id(id: int) -> str:
+    from matplotlib import colors as mcolors
+
     return mcolors.CSS4_COLORS[colors[id % len(colors)]]
 
 
@@ -0,0 +1,338 @@
+import io
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from sys import getsizeof
+from threading import RLock
+from typing import Iterable, List, Optional, Union
+
+from .base_types import AggregatorNode, Node, Stat
+from .run import Run
+from .sparse import SparseValue
+
+PathLike = Union[str, os.PathLike]
+
+
+# NOTE: Sizes are deep sizes of what the object owns. Parent Nodes are owned
+# by the tree, so stats only count the references to them.
+def _sizeof_value(value) -> int:
+    if isinstance(value, list):
+        return getsizeof(value) + sum(_sizeof_value(item) for item in value)
+    if hasattr(value, "__dict__"):
+        return (
+            getsizeof(value)
+            + getsizeof(value.__dict__)
+            + sum(getsizeof(item) for item in vars(value).values())
+        )
+    return getsizeof(value)
+
+
+# NOTE: The keys of a SparseValue are shared with other stats of the run,
+# sizeof_stats counts them once for the whole run.
+def _sizeof_sparse(value: SparseValue) -> int:
+    return (
+        getsizeof(value)
+        + getsizeof(value.explicit())
+        + sum(_sizeof_value(item) for item in value.explicit().values())
+        + _sizeof_value(value.fill())
+    )
+
+
+def sizeof_stat(stat: Stat) -> int:
+    if isinstance(stat.value(), SparseValue):
+        return (
+            getsizeof(stat)
+            + getsizeof(stat.__dict__)
+            + getsizeof(stat.name())
+            + getsizeof(stat.parents())
+            + _sizeof_sparse(stat.value())
+            + sum(
+                _sizeof_value(value)
+                for attribute, value in vars(stat).items()
+                if attribute not in ("_index", "_name", "_value", "_parents")
+            )
+        )
+    size = (
+        getsizeof(stat)
+        + getsizeof(stat.__dict__)
+        + getsizeof(stat.name())
+        + getsizeof(stat.value())
+        + getsizeof(stat.parents())
+    )
+    for attribute, value in vars(stat).items():
+        if attribute not in ("_index", "_name", "_value", "_parents"):
+            size += _sizeof_value(value)
+    return size + sum(_sizeof_value(value) for value in stat.value().values())
+
+
+def sizeof_tree(root: Node) -> int:
+    size = 0
+    to_visit = [root]
+    while to_visit:
+        node = to_visit.pop()
+        size += (
+            getsizeof(node)
+            + getsizeof(node.__dict__)
+            + getsizeof(node.name())
+            + getsizeof(node.path())
+            + getsizeof(node.children())
+        )
+        to_visit.extend(node.children())
+    return size
+
+
+def _sizeof_shared_keys(stats: dict) -> int:
+    shared = dict()
+    for stat in stats.values():
+        if isinstance(stat.value(), SparseValue):
+            for keys in stat.value().shared_keys():
+                shared[id(keys)] = keys
+    return sum(getsizeof(keys) for keys in shared.values())
+
+
+def sizeof_stats(stats: dict) -> int:
+    return (
+        getsizeof(stats)
+        + sum(sizeof_stat(stat) for stat in stats.values())
+        + _sizeof_shared_keys(stats)
+    )
+
+
+def memory_report(runs: Iterable[Run]) -> List[dict]:
+    ret = []
+    for run in runs:
+        stats = run.stats()
+        tree_bytes = sizeof_tree(run.root())
+        stat_bytes = {name: sizeof_stat(stat) for name, stat in stats.items()}
+        ret.append(
+            {
+                "index": run.index(),
+                "tree_bytes": tree_bytes,
+                "stats_bytes": sum(stat_bytes.values()),
+                "total_bytes": tree_bytes + sizeof_stats(stats),
+                "stats": stat_bytes,
+            }
+        )
+    return ret
+
+
+def _nodes_by_path(root: Node) -> dict[str, Node]:
+    ret = dict()
+    to_visit = [root]
+    while to_visit:
+        node = to_visit.pop()
+        ret[node.path()] = node
+        to_visit.extend(node.children())
+    return ret
+
+
+# NOTE: Nodes are written as references so that reloaded stats point back
+# into the tree of the run instead of into a copy of it.
+class _StatsPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, AggregatorNode):
+            return ("aggregator", type(obj))
+        if isinstance(obj, Node):
+            return ("node", obj.path(), obj.name())
+        return None
+
+
+class _StatsUnpickler(pickle.Unpickler):
+    def __init__(self, file, nodes: dict[str, Node]) -> None:
+        super().__init__(file)
+        self._nodes = nodes
+
+    def persistent_load(self, pid):
+        if pid[0] == "aggregator":
+            return pid[1]()
+        _, path, name = pid
+        if path not in self._nodes:
+            self._nodes[path] = Node(name, path)
+        return self._nodes[path]
+
+
+# NOTE: Pickles obj with every Node in it written as its path. loads_by_path
+# resolves them against nodes, which maps paths to the Nodes to use, and adds
+# a childless Node for every path it does not have.
+def dumps_by_path(obj) -> bytes:
+    buffer = io.BytesIO()
+    _StatsPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+def loads_by_path(data: bytes, nodes: dict[str, Node]):
+    return _StatsUnpickler(io.BytesIO(data), nodes).load()
+
+
+# NOTE: A run as bytes for sending it to another process. The tree is a list
+# of (position of the parent, name, path) in depth first order and the stats
+# point into it by path.
+def dumps_run(run: Run) -> bytes:
+    tree = []
+    to_visit = [(run.root(), -1)]
+    while to_visit:
+        node, parent = to_visit.pop()
+        tree.append((parent, node.name(), node.path()))
+        position = len(tree) - 1
+        to_visit.extend(
+            (child, position) for child in reversed(node.children())
+        )
+    return dumps_by_path((run.index(), tree, run.stats()))
+
+
+def loads_run(data: bytes) -> Run:
+    nodes = dict()
+    index, tree, stats = loads_by_path(data, nodes)
+    built = []
+    for parent, name, path in tree:
+        if path not in nodes:
+            nodes[path] = Node(name, path)
+        if parent >= 0:
+            built[parent].add_child(nodes[path])
+        built.append(nodes[path])
+    return Run(index, built[0], stats)
+
+
+class SpillingRunCache:
+    def __init__(self, budget: int, path: Optional[PathLike] = None) -> None:
+        if budget <= 0:
+            raise ValueError("budget should be a positive number of bytes.")
+        self._budget = budget
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="graphix-spill-")
+            os.close(fd)
+        self._path = os.fspath(path)
+        self._file = open(self._path, "w+b")
+        # NOTE: id(run) -> [run, resident bytes or None, (offset, capacity)],
+        # ordered from least to most recently used. A run keeps its slot in
+        # the spill file while it is resident, so spilling it again reuses
+        # it. Slots nobody owns anymore are (offset, capacity) in _free.
+        self._entries = OrderedDict()
+        self._free = []
+        self._lock = RLock()
+        self._resident_bytes = 0
+        self._spills = 0
+        self._reloads = 0
+
+    def budget(self) -> int:
+        return self._budget
+
+    def path(self) -> str:
+        return self._path
+
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    def spill_file_bytes(self) -> int:
+        return os.fstat(self._file.fileno()).st_size
+
+    def num_spills(self) -> int:
+        return self._spills
+
+    def num_reloads(self) -> int:
+        return self._reloads
+
+    def runs(self) -> List[Run]:
+        return [entry[0] for entry in self._entries.values()]
+
+    def is_resident(self, run: Run) -> bool:
+        return self._entries[id(run)][1] is not None
+
+    def add(self, run: Run) -> Run:
+        with self._lock:
+            if run._spill is not None:
+                raise ValueError("This run is already managed by a cache.")
+            size = sizeof_stats(run._stats)
+            self._entries[id(run)] = [run, size, None]
+            self._resident_bytes += size
+            run._spill = self
+            self._enforce(run)
+        return run
+
+    def remove(self, run: Run) -> None:
+        with self._lock:
+            entry = self._entries.pop(id(run))
+            if entry[1] is None:
+                self._reload(entry)
+            if entry[2] is not None:
+                self._free.append(entry[2])
+            self._resident_bytes -= entry[1]
+            run._spill = None
+
+    def touch(self, run: Run) -> dict:
+        with self._lock:
+            # NOTE: Removed from the cache by another thread, remove() has
+            # reloaded its stats already.
+            if id(run) not in self._entries:
+                return run._stats
+            entry = self._entries[id(run)]
+            self._entries.move_to_end(id(run))
+            if entry[1] is None:
+                self._reload(entry)
+                self._enforce(run)
+            return run._stats
+
+    def _reload(self, entry: list) -> None:
+        run, _, (offset, _) = entry
+        self._file.seek(offset)
+        run._stats = _StatsUnpickler(
+            self._file, _nodes_by_path(run.root())
+        ).load()
+        entry[1] = sizeof_stats(run._stats)
+        self._resident_bytes += entry[1]
+        self._reloads += 1
+
+    # NOTE: First fit: the run's own slot, then a free slot, then the end of
+    # the file. A slot that is too small is freed for smaller records.
+    def _allocate(self, entry: list, length: int) -> tuple[int, int]:
+        if entry[2] is not None:
+            if entry[2][1] >= length:
+                return entry[2]
+            self._free.append(entry[2])
+            entry[2] = None
+        for position, (offset, capacity) in enumerate(self._free):
+            if capacity >= length:
+                del self._free[position]
+                return offset, capacity
+        return self._file.seek(0, os.SEEK_END), length
+
+    def _spill_one(self, entry: list) -> None:
+        run, size, _ = entry
+        # NOTE: Stats are always written again since they may have been
+        # changed since they were reloaded.
+        record = dumps_by_path(run._stats)
+        offset, capacity = self._allocate(entry, len(record))
+        self._file.seek(offset)
+        self._file.write(record)
+        self._file.flush()
+        run._stats = None
+        entry[1] = None
+        entry[2] = (offset, capacity)
+        self._resident_bytes -= size
+        self._spills += 1
+
+    # NOTE: The run being accessed is never evicted, even if it alone is
+    # larger than the budget.
+    def _enforce(self, keep: Run) -> None:
+        if self._resident_bytes <= self._budget:
+            return
+        for run_id, entry in list(self._entries.items()):
+            if self._resident_bytes <= self._budget:
+                break
+            if run_id == id(keep) or entry[1] is None:
+                continue
+            self._spill_one(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            for run, _, _ in list(self._entries.values()):
+                self.remove(run)
+            self._file.close()
+            os.remove(self._path)
+
+    def __enter__(self) -> "SpillingRunCache":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,291 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Sequence
+from warnings import warn
+
+import numpy as np
+
+from .aggregators import array_reducer
+from .base_types import AggregatorNode, Node
+from .stats import Scalar
+from .util import to_float
+
+# NOTE: Set in every worker by _init_worker. Workers only ever see the names
+# of the shared memory blocks, never the stats themselves.
+_worker = dict()
+
+
+def _attach(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def _init_worker(
+    input_name: str,
+    input_shape: tuple,
+    output_name: str,
+    output_shape: tuple,
+) -> None:
+    warnings.simplefilter("ignore")
+    blocks = [_attach(input_name), _attach(output_name)]
+    _worker["blocks"] = blocks
+    _worker["input"] = np.ndarray(
+        input_shape, dtype=np.float64, buffer=blocks[0].buf
+    )
+    _worker["output"] = np.ndarray(
+        output_shape, dtype=np.float64, buffer=blocks[1].buf
+    )
+
+
+def _reduce_rows(
+    matrix: np.ndarray,
+    output: np.ndarray,
+    aggregators: List[type],
+    start: int,
+    end: int,
+) -> None:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for column, aggregator in enumerate(aggregators):
+            output[start:end, column] = array_reducer(aggregator)(
+                matrix[start:end], axis=1
+            )
+
+
+def _derive_rows(
+    matrices: np.ndarray,
+    output: np.ndarray,
+    function: Callable,
+    start: int,
+    end: int,
+) -> None:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        output[start:end] = function(
+            *[matrix[start:end] for matrix in matrices]
+        )
+
+
+def _run_reduce(aggregators: List[type], start: int, end: int) -> None:
+    _reduce_rows(_worker["input"], _worker["output"], aggregators, start, end)
+
+
+def _run_derive(function: Callable, start: int, end: int) -> None:
+    _derive_rows(_worker["input"], _worker["output"], function, start, end)
+
+
+def _chunks(num_rows: int, max_workers: int) -> List[tuple[int, int]]:
+    num_chunks = min(num_rows, 4 * max_workers)
+    edges = np.linspace(0, num_rows, num_chunks + 1).astype(int)
+    return [
+        (start, end)
+        for start, end in zip(edges[:-1], edges[1:])
+        if end > start
+    ]
+
+
+def _shared_copy(array: np.ndarray) -> SharedMemory:
+    block = SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=np.float64, buffer=block.buf)[:] = array
+    return block
+
+
+# NOTE: Every row is handled by exactly one task with the same numpy
+# reduction, so results do not depend on the number of workers.
+def _run_parallel(
+    task: Callable,
+    serial: Callable,
+    argument,
+    inputs: np.ndarray,
+    output_shape: tuple,
+    num_rows: int,
+    max_workers: Optional[int],
+) -> np.ndarray:
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, num_rows))
+    if max_workers == 1:
+        output = np.full(output_shape, np.nan)
+        serial(inputs, output, argument, 0, num_rows)
+        return output
+
+    input_block = _shared_copy(inputs)
+    output_block = _shared_copy(np.full(output_shape, np.nan))
+    output = np.ndarray(
+        output_shape, dtype=np.float64, buffer=output_block.buf
+    )
+    try:
+        chunks = _chunks(num_rows, max_workers)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                input_block.name,
+                inputs.shape,
+                output_block.name,
+                output_shape,
+            ),
+        ) as executor:
+            list(
+                executor.map(
+                    task,
+                    [argument] * len(chunks),
+                    *zip(*chunks),
+                )
+            )
+        return output.copy()
+    finally:
+        del output
+        for block in [input_block, output_block]:
+            block.close()
+            block.unlink()
+
+
+def pack_scalars(
+    stats: Sequence[Scalar], parents: Optional[List[Node]] = None
+) -> tuple[List[Node], np.ndarray]:
+    if parents is None:
+        columns = dict()
+        for stat in stats:
+            for parent in stat.parents():
+                columns.setdefault(parent, len(columns))
+        parents = list(columns.keys())
+    else:
+        columns = {parent: column for column, parent in enumerate(parents)}
+    matrix = np.full((len(stats), len(parents)), np.nan)
+    for row, stat in enumerate(stats):
+        if not isinstance(stat, Scalar):
+            raise ValueError("Only Scalar stats can be packed.")
+        value = stat.value()
+        matrix[row, [columns[parent] for parent in value]] = [
+            to_float(item) for item in value.values()
+        ]
+    return parents, matrix
+
+
+def reduce_matrix(
+    matrix: np.ndarray,
+    aggregators: Sequence[AggregatorNode],
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    aggregator_types = [type(aggregator) for aggregator in aggregators]
+    for aggregator_type in aggregator_types:
+        if array_reducer(aggregator_type) is None:
+            raise ValueError(
+                f"{aggregator_type.__name__} can not be run in parallel."
+            )
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    if matrix.ndim != 2:
+        raise ValueError("matrix should be two dimensional.")
+    return _run_parallel(
+        _run_reduce,
+        _reduce_rows,
+        aggregator_types,
+        matrix,
+        (matrix.shape[0], len(aggregator_types)),
+        matrix.shape[0],
+        max_workers,
+    )
+
+
+def reduce_many(
+    stats: Sequence[Scalar],
+    aggregators: Sequence[AggregatorNode],
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    _, matrix = pack_scalars(stats)
+    return reduce_matrix(matrix, aggregators, max_workers)
+
+
+# NOTE: The reductions are numpy's nan-aware ones, so like the serial
+# aggregators na values are dropped, but they are done in floating point
+# (statistics.mean is exact, results may differ in the last digits), and
+# where the serial aggregators raise, i.e. a stat with no values left or a
+# geometric mean of negative values, the result is nan with a warning.
+def aggregate_many(
+    stats: Sequence[Scalar],
+    aggregator: AggregatorNode,
+    max_workers: Optional[int] = None,
+) -> List[Scalar]:
+    warn(
+        f"{type(aggregator).__name__} will drop na values from the original "
+        "stats."
+    )
+    results = reduce_many(stats, [aggregator], max_workers)[:, 0]
+    num_nan = int(np.isnan(results).sum())
+    if num_nan:
+        warn(
+            f"{type(aggregator).__name__} could not aggregate {num_nan} of "
+            f"the {len(stats)} stats, their aggregate is nan."
+        )
+    ret = []
+    for stat, result in zip(stats, results):
+        new_value = stat.dropna().value().copy()
+        new_value[aggregator] = float(result)
+        to_ret = Scalar(stat.index(), stat.name())
+        to_ret._set_value(new_value)
+        to_ret._set_parents(list(new_value.keys()))
+        ret.append(to_ret)
+    return ret
+
+
+# NOTE: function gets one (runs x parents) array per operand and should
+# return an array of the same shape. It has to be importable by the workers,
+# so lambdas only work with max_workers=1. Like the Scalar operators, a result
+# is only made for the parents every operand of the run has, and nan results
+# are kept.
+def derive_many(
+    function: Callable,
+    operands: Sequence[Sequence[Scalar]],
+    name: str,
+    max_workers: Optional[int] = None,
+) -> List[Scalar]:
+    if len({len(stats) for stats in operands}) != 1:
+        raise ValueError("Every operand should have one stat per run.")
+    for stats in zip(*operands):
+        if any(stat.index() != stats[0].index() for stat in stats):
+            raise ValueError(
+                "Indices of the operands are not the same. "
+                "This means they are from different simluation runs."
+            )
+    parents, _ = pack_scalars([stat for stats in operands for stat in stats])
+    matrices = np.stack(
+        [pack_scalars(stats, parents)[1] for stats in operands]
+    )
+    num_runs = matrices.shape[1]
+    columns = {parent: column for column, parent in enumerate(parents)}
+    present = np.ones((num_runs, len(parents)), dtype=bool)
+    for stats in operands:
+        for row, stat in enumerate(stats):
+            mask = np.zeros(len(parents), dtype=bool)
+            mask[[columns[parent] for parent in stat.value()]] = True
+            present[row] &= mask
+    results = _run_parallel(
+        _run_derive,
+        _derive_rows,
+        function,
+        matrices,
+        (num_runs, len(parents)),
+        num_runs,
+        max_workers,
+    )
+    ret = []
+    for row, stat in enumerate(operands[0]):
+        new_value = {
+            parent: float(result)
+            for parent, result, keep in zip(
+                parents, results[row], present[row]
+            )
+            if keep
+        }
+        to_ret = Scalar(stat.index(), name)
+        to_ret._set_value(new_value)
+        to_ret._set_parents(list(new_value.keys()))
+        ret.append(to_ret)
+    return ret
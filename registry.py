@@ -0,0 +1,115 @@
+from typing import Any, Iterable, List, Optional
+
+from .base_types import Stat
+from .run import Run
+
+
+# NOTE: Sets of runs are kept as bitmaps in plain ints, bit i is set if run i
+# is in the set. &, | and ~ combine filters without touching every run.
+def bitmap_to_ids(bitmap: int) -> List[int]:
+    return [
+        run_id
+        for run_id, bit in enumerate(reversed(bin(bitmap)[2:]))
+        if bit == "1"
+    ]
+
+
+class RunRegistry:
+    def __init__(self, runs: Iterable[Run] = ()) -> None:
+        self._runs = []
+        self._postings = dict()
+        for run in runs:
+            self.add(run)
+
+    def add(self, run: Run) -> int:
+        run_id = len(self._runs)
+        self._runs.append(run)
+        bit = 1 << run_id
+        for key, value in run.index().items():
+            values = self._postings.setdefault(key, dict())
+            values[value] = values.get(value, 0) | bit
+        return run_id
+
+    def replace(self, run_id: int, run: Run) -> None:
+        bit = 1 << run_id
+        for key, value in self._runs[run_id].index().items():
+            values = self._postings[key]
+            values[value] &= ~bit
+            if not values[value]:
+                del values[value]
+            if not values:
+                del self._postings[key]
+        self._runs[run_id] = run
+        for key, value in run.index().items():
+            values = self._postings.setdefault(key, dict())
+            values[value] = values.get(value, 0) | bit
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def run(self, run_id: int) -> Run:
+        return self._runs[run_id]
+
+    def runs(self, run_ids: Optional[Iterable[int]] = None) -> List[Run]:
+        if run_ids is None:
+            return list(self._runs)
+        return [self._runs[run_id] for run_id in run_ids]
+
+    def keys(self) -> List[str]:
+        return list(self._postings.keys())
+
+    def all(self) -> int:
+        return (1 << len(self._runs)) - 1
+
+    def mask(
+        self, where: Optional[dict] = None, exclude: Optional[dict] = None
+    ) -> int:
+        bitmap = self.all()
+        for key, values in (where or dict()).items():
+            bitmap &= self._any_of(key, values)
+        for key, values in (exclude or dict()).items():
+            bitmap &= ~self._any_of(key, values)
+        return bitmap
+
+    def _any_of(self, key: str, values: Any) -> int:
+        if key not in self._postings:
+            raise ValueError(f"No run has {key} in its index.")
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            values = [values]
+        bitmap = 0
+        for value in values:
+            bitmap |= self._postings[key].get(value, 0)
+        return bitmap
+
+    def select(
+        self, where: Optional[dict] = None, exclude: Optional[dict] = None
+    ) -> List[int]:
+        return bitmap_to_ids(self.mask(where, exclude))
+
+    def filter(
+        self, where: Optional[dict] = None, exclude: Optional[dict] = None
+    ) -> List[Run]:
+        return self.runs(self.select(where, exclude))
+
+    def unique_values(self, bitmap: Optional[int] = None) -> dict[str, List]:
+        if bitmap is None:
+            return {
+                key: list(values.keys())
+                for key, values in self._postings.items()
+            }
+        return {
+            key: [value for value, runs in values.items() if runs & bitmap]
+            for key, values in self._postings.items()
+        }
+
+    def stats(
+        self,
+        name: str,
+        where: Optional[dict] = None,
+        exclude: Optional[dict] = None,
+    ) -> List[Stat]:
+        return [
+            run.stat(name)
+            for run in self.filter(where, exclude)
+            if name in run
+        ]
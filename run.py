@@ -0,0 +1,42 @@
+from typing import List
+
+from .base_types import Node, Stat
+
+
+class Run:
+    def __init__(self, index: dict, root: Node, stats: dict) -> None:
+        self._index = index
+        self._root = root
+        self._stats = stats
+        # NOTE: Set by SpillingRunCache, which may move the stats to disk
+        # and reloads them on access.
+        self._spill = None
+
+    def index(self) -> dict:
+        return self._index
+
+    def root(self) -> Node:
+        return self._root
+
+    # NOTE: The cache hands back the stats while it holds its lock, another
+    # thread may spill them again right after.
+    def stats(self) -> dict:
+        spill = self._spill
+        if spill is not None:
+            return spill.touch(self)
+        return self._stats
+
+    def stat(self, name: str) -> Stat:
+        return self.stats()[name]
+
+    def names(self) -> List[str]:
+        return list(self.stats().keys())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.stats()
+
+    def __str__(self) -> str:
+        return f"Run(index: {self._index}, stats: {len(self.stats())})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
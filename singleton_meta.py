@@ -1,9 +1,17 @@
+from threading import RLock
+
+
 class SingletonMeta(type):
     _instances = {}
+    _lock = RLock()
 
     def __call__(cls, *args, **kwds):
+        # NOTE: Double-checked so that the common case of an existing
+        # instance does not take the lock.
         if cls not in cls._instances:
-            cls._instances[cls] = super(SingletonMeta, cls).__call__(
-                *args, **kwds
-            )
+            with cls._lock:
+                if cls not in cls._instances:
+                    cls._instances[cls] = super(SingletonMeta, cls).__call__(
+                        *args, **kwds
+                    )
         return cls._instances[cls]
@@ -0,0 +1,209 @@
+from collections import Counter
+from collections.abc import MutableMapping
+from typing import Any, Callable, Hashable, Iterator, Optional, Union
+
+from .base_types import Node
+
+
+# NOTE: Holds the value dict of a stat whose parents mostly share one value
+# (0 on idle cores, nan on disabled units, an all zero histogram). Only the
+# other values are stored, the rest is answered from the fill value. The
+# keys are kept in a tuple/frozenset that is shared by every stat with the
+# same parents, so a compacted stat costs next to nothing per parent.
+class SparseValue(MutableMapping):
+    __slots__ = ("_fill", "_keys", "_members", "_explicit", "_num_extra")
+
+    def __init__(
+        self,
+        fill: Any,
+        keys: tuple,
+        members: frozenset,
+        explicit: dict,
+        num_extra: int = 0,
+    ) -> None:
+        self._fill = fill
+        self._keys = keys
+        self._members = members
+        # NOTE: Keys in explicit that are not members were added after the
+        # stat was compacted (e.g. an AggregatorNode), num_extra counts them.
+        self._explicit = explicit
+        self._num_extra = num_extra
+
+    def fill(self) -> Any:
+        return self._fill
+
+    def explicit(self) -> dict:
+        return self._explicit
+
+    def shared_keys(self) -> tuple[tuple, frozenset]:
+        return self._keys, self._members
+
+    def num_fill(self) -> int:
+        return len(self._keys) - sum(
+            1 for key in self._explicit if key in self._members
+        )
+
+    def density(self) -> float:
+        return len(self._explicit) / len(self) if len(self) else 0.0
+
+    def __getitem__(self, key: Node) -> Any:
+        try:
+            return self._explicit[key]
+        except KeyError:
+            if key in self._members:
+                return self._fill
+            raise
+
+    def __setitem__(self, key: Node, value: Any) -> None:
+        if key not in self._explicit and key not in self._members:
+            self._num_extra += 1
+        self._explicit[key] = value
+
+    def __delitem__(self, key: Node) -> None:
+        if key in self._members:
+            # NOTE: Copy on write, the shared keys are left alone.
+            self._keys = tuple(other for other in self._keys if other != key)
+            self._members = frozenset(self._keys)
+            self._explicit.pop(key, None)
+        else:
+            del self._explicit[key]
+            self._num_extra -= 1
+
+    def __contains__(self, key: Node) -> bool:
+        return key in self._members or key in self._explicit
+
+    def __iter__(self) -> Iterator[Node]:
+        yield from self._keys
+        if self._num_extra:
+            for key in self._explicit:
+                if key not in self._members:
+                    yield key
+
+    def __len__(self) -> int:
+        return len(self._keys) + self._num_extra
+
+    def copy(self) -> "SparseValue":
+        return SparseValue(
+            self._fill,
+            self._keys,
+            self._members,
+            dict(self._explicit),
+            self._num_extra,
+        )
+
+    def map(self, function: Callable[[Any], Any]) -> "SparseValue":
+        return SparseValue(
+            function(self._fill),
+            self._keys,
+            self._members,
+            {key: function(value) for key, value in self._explicit.items()},
+            self._num_extra,
+        )
+
+    # NOTE: Both sides need the same keys. function runs once for the two
+    # fill values and once per key that is explicit on either side.
+    def combine(
+        self, other: "SparseValue", function: Callable[[Any, Any], Any]
+    ) -> "SparseValue":
+        explicit = {
+            key: function(self[key], other[key])
+            for key in dict.fromkeys(
+                list(self._explicit) + list(other.explicit())
+            )
+        }
+        return SparseValue(
+            function(self._fill, other.fill()),
+            self._keys,
+            self._members,
+            explicit,
+            self._num_extra,
+        )
+
+    def filter(
+        self, predicate: Callable[[Any], bool]
+    ) -> Union["SparseValue", dict]:
+        if not predicate(self._fill):
+            return {
+                key: value
+                for key, value in self._explicit.items()
+                if predicate(value)
+            }
+        dropped = {
+            key
+            for key, value in self._explicit.items()
+            if not predicate(value)
+        }
+        if not dropped:
+            return self.copy()
+        keys = tuple(key for key in self._keys if key not in dropped)
+        explicit = {
+            key: value
+            for key, value in self._explicit.items()
+            if key not in dropped
+        }
+        members = frozenset(keys)
+        return SparseValue(
+            self._fill,
+            keys,
+            members,
+            explicit,
+            sum(1 for key in explicit if key not in members),
+        )
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self}
+
+    def __str__(self) -> str:
+        return (
+            f"SparseValue(fill: {self._fill}, num_keys: {len(self)}, "
+            f"explicit: {self._explicit})"
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+_min_size = 8
+
+
+def compact(
+    value: dict,
+    fill_key: Callable[[Any], Optional[Hashable]],
+    max_density: float,
+    shared_keys: dict,
+) -> Union[SparseValue, dict]:
+    if isinstance(value, SparseValue) or len(value) < _min_size:
+        return value
+    # NOTE: Most stats are dense, give up as soon as too many values can not
+    # be a fill value.
+    max_misses = max_density * len(value)
+    keys = []
+    misses = 0
+    for item in value.values():
+        key = fill_key(item)
+        if key is None:
+            misses += 1
+            if misses > max_misses:
+                return value
+        keys.append(key)
+    counts = Counter(key for key in keys if key is not None)
+    if not counts:
+        return value
+    common, count = counts.most_common(1)[0]
+    if (len(value) - count) / len(value) > max_density:
+        return value
+
+    fill = None
+    explicit = dict()
+    for (parent, item), key in zip(value.items(), keys):
+        if key != common:
+            explicit[parent] = item
+        elif fill is None:
+            fill = item
+    # NOTE: Stats of the same kind of SimObject have the same parents, they
+    # all point to one tuple and one frozenset.
+    parents = tuple(value.keys())
+    if parents not in shared_keys:
+        shared_keys[parents] = (parents, frozenset(parents))
+    parents, members = shared_keys[parents]
+    return SparseValue(fill, parents, members, explicit)
@@ -1,13 +1,57 @@
-from typing import List, Set, Union
+import operator
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Hashable, List, Optional, Set, Union
 from warnings import warn
 
 from .base_types import AggregatorNode, Node, Stat
 from .compare_util import BiggestThing, SmallestThing
+from .sparse import SparseValue, compact
+
+if TYPE_CHECKING:
+    from .bootstrap import Bootstrap
+
+
+def _divide(left: Any, right: Any) -> Any:
+    try:
+        return left / right
+    except ZeroDivisionError:
+        return "inf"
 
 
 class Scalar(Stat):
     def __init__(self, index: dict, name: str) -> None:
         super().__init__(index, name, "Scalar")
+        # NOTE: parent -> (low, high), only set by aggregators that were
+        # asked for a bootstrap confidence interval.
+        self._intervals = dict()
+
+    def intervals(self) -> dict:
+        return self._intervals
+
+    def interval(self, parent: Node) -> Optional[tuple[float, float]]:
+        return self._intervals.get(parent, None)
+
+    def _set_intervals(self, intervals: dict) -> None:
+        self._intervals = intervals
+
+    @staticmethod
+    def _fill_key(value: Any) -> Optional[Hashable]:
+        if isinstance(value, float) and value != value:
+            return "nan"
+        if isinstance(value, str) or value == 0:
+            return (type(value), value)
+        return None
+
+    def _compact(self, max_density: float, shared_keys: dict) -> None:
+        self._value = compact(
+            self._value, Scalar._fill_key, max_density, shared_keys
+        )
+
+    def _sparse_result(self, value: SparseValue, name: str) -> "Scalar":
+        to_ret = Scalar(self._index, name)
+        to_ret._set_value(value)
+        to_ret._set_parents(list(value.keys()))
+        return to_ret
 
     def process_dict(self, parent: Node, key: str, value: dict) -> None:
         assert self._name == key
@@ -34,19 +78,37 @@ class Scalar(Stat):
         return to_ret
 
     def dropna(self) -> "Scalar":
-        new_value = {
-            parent: value
-            for parent, value in self._value.items()
-            if isinstance(value, (int, float))
-        }
+        if isinstance(self._value, SparseValue):
+            new_value = self._value.filter(
+                lambda value: isinstance(value, (int, float))
+            )
+        else:
+            new_value = {
+                parent: value
+                for parent, value in self._value.items()
+                if isinstance(value, (int, float))
+            }
 
         to_ret = Scalar(self._index, self._name)
         to_ret._set_value(new_value)
         to_ret._set_parents(list(new_value.keys()))
+        to_ret._set_intervals(
+            {
+                parent: interval
+                for parent, interval in self._intervals.items()
+                if parent in new_value
+            }
+        )
         return to_ret
 
-    def aggregate_using(self, aggregator: AggregatorNode) -> None:
-        return aggregator.aggregate(self)
+    def aggregate_using(
+        self,
+        aggregator: AggregatorNode,
+        bootstrap: Optional["Bootstrap"] = None,
+    ) -> None:
+        if bootstrap is None:
+            return aggregator.aggregate(self)
+        return aggregator.aggregate(self, bootstrap)
 
     def __add__(self, other: Union["Scalar", int, float]) -> "Scalar":
         if isinstance(other, Stat):
@@ -67,6 +129,13 @@ class Scalar(Stat):
                     "that using meld function."
                 )
 
+            if isinstance(self._value, SparseValue) and isinstance(
+                other.value(), SparseValue
+            ):
+                return self._sparse_result(
+                    self._value.combine(other.value(), operator.add),
+                    f"({self._name} + {other.name()})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] + other.value()[parent]
@@ -75,6 +144,11 @@ class Scalar(Stat):
             to_ret._set_parents(list(new_value.keys()))
             return to_ret
         elif isinstance(other, (int, float)):
+            if isinstance(self._value, SparseValue):
+                return self._sparse_result(
+                    self._value.map(lambda value: operator.add(value, other)),
+                    f"({self._name} + {other})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] + other
@@ -101,6 +175,13 @@ class Scalar(Stat):
                     "that using meld function."
                 )
 
+            if isinstance(self._value, SparseValue) and isinstance(
+                other.value(), SparseValue
+            ):
+                return self._sparse_result(
+                    self._value.combine(other.value(), operator.sub),
+                    f"({self._name} - {other.name()})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] - other.value()[parent]
@@ -109,6 +190,11 @@ class Scalar(Stat):
             to_ret._set_parents(list(new_value.keys()))
             return to_ret
         elif isinstance(other, (int, float)):
+            if isinstance(self._value, SparseValue):
+                return self._sparse_result(
+                    self._value.map(lambda value: operator.sub(value, other)),
+                    f"({self._name} - {other})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] - other
@@ -135,6 +221,13 @@ class Scalar(Stat):
                     "that using meld function."
                 )
 
+            if isinstance(self._value, SparseValue) and isinstance(
+                other.value(), SparseValue
+            ):
+                return self._sparse_result(
+                    self._value.combine(other.value(), operator.mul),
+                    f"({self._name} * {other.name()})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] * other.value()[parent]
@@ -143,6 +236,11 @@ class Scalar(Stat):
             to_ret._set_parents(list(new_value.keys()))
             return to_ret
         elif isinstance(other, (int, float)):
+            if isinstance(self._value, SparseValue):
+                return self._sparse_result(
+                    self._value.map(lambda value: operator.mul(value, other)),
+                    f"({self._name} * {other})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] * other
@@ -169,6 +267,13 @@ class Scalar(Stat):
                     "that using meld function."
                 )
 
+            if isinstance(self._value, SparseValue) and isinstance(
+                other.value(), SparseValue
+            ):
+                return self._sparse_result(
+                    self._value.combine(other.value(), _divide),
+                    f"({self._name} / {other.name()})",
+                )
             new_value = dict()
             for parent in self._parents:
                 try:
@@ -182,6 +287,11 @@ class Scalar(Stat):
             to_ret._set_parents(list(new_value.keys()))
             return to_ret
         elif isinstance(other, (int, float)):
+            if isinstance(self._value, SparseValue):
+                return self._sparse_result(
+                    self._value.map(lambda value: _divide(value, other)),
+                    f"({self._name} / {other})",
+                )
             new_value = dict()
             for parent in self._parents:
                 try:
@@ -250,6 +360,13 @@ class Scalar(Stat):
                     "that using meld function."
                 )
 
+            if isinstance(self._value, SparseValue) and isinstance(
+                other.value(), SparseValue
+            ):
+                return self._sparse_result(
+                    self._value.combine(other.value(), operator.pow),
+                    f"({self._name} ** {other.name()})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = (
@@ -260,6 +377,11 @@ class Scalar(Stat):
             to_ret._set_parents(list(new_value.keys()))
             return to_ret
         elif isinstance(other, (int, float)):
+            if isinstance(self._value, SparseValue):
+                return self._sparse_result(
+                    self._value.map(lambda value: operator.pow(value, other)),
+                    f"{self._name} ** {other}",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] ** other
@@ -286,6 +408,13 @@ class Scalar(Stat):
                     "that using meld function."
                 )
 
+            if isinstance(self._value, SparseValue) and isinstance(
+                other.value(), SparseValue
+            ):
+                return self._sparse_result(
+                    self._value.combine(other.value(), operator.mod),
+                    f"({self._name} % {other.name()})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] % other.value()[parent]
@@ -294,6 +423,11 @@ class Scalar(Stat):
             to_ret._set_parents(list(new_value.keys()))
             return to_ret
         elif isinstance(other, (int, float)):
+            if isinstance(self._value, SparseValue):
+                return self._sparse_result(
+                    self._value.map(lambda value: operator.mod(value, other)),
+                    f"({self._name} % {other})",
+                )
             new_value = dict()
             for parent in self._parents:
                 new_value[parent] = self._value[parent] % other
@@ -346,6 +480,25 @@ class Distribution(Stat):
     def __init__(self, index: dict, name: str) -> None:
         super().__init__(index, name, "Distribution")
 
+    # NOTE: Only histograms without a single sample can be a fill value, and
+    # only for others of the same geometry.
+    @staticmethod
+    def _fill_key(buckets: list) -> Optional[Hashable]:
+        if not buckets or any(map(_bucket_freq, buckets)):
+            return None
+        return (
+            buckets[0].lower_bound(),
+            buckets[-1].upper_bound(),
+            len(buckets),
+        )
+
+    # NOTE: Parents with an empty histogram of the same geometry share one
+    # bucket list, which should be treated as read-only.
+    def _compact(self, max_density: float, shared_keys: dict) -> None:
+        self._value = compact(
+            self._value, Distribution._fill_key, max_density, shared_keys
+        )
+
     def process_dict(self, parent: Node, key: str, value: dict) -> None:
         assert self._name == key
         assert value["num_bins"] == len(value["value"])
@@ -409,4 +562,7 @@ class Distribution(Stat):
         raise RuntimeError("You should not mod two Distribution stats.")
 
 
+_bucket_freq = attrgetter("_freq")
+
+
 # TODO: Add class for Vector stats.
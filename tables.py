@@ -0,0 +1,248 @@
+from importlib import import_module
+from typing import Any, List, Sequence, Union
+
+import numpy as np
+
+from .base_types import Node
+from .columnar import ColumnarRuns
+from .correlation import scalar_matrix
+from .run import Run
+from .stats import Scalar
+
+_reserved = ["stat", "path", "value"]
+
+
+def _require(module: str, purpose: str) -> Any:
+    try:
+        return import_module(module)
+    except ImportError:
+        raise ImportError(
+            f"{purpose} requires the `{module}` package "
+            f"(pip install {module})."
+        )
+
+
+# NOTE: Everything is built from one (runs x features) float matrix. For a
+# ColumnarRuns that matrix is a view over the memory mapped file.
+def _scalar_data(
+    source: Union[Sequence[Run], ColumnarRuns],
+) -> tuple[List[dict], List[tuple[str, str]], np.ndarray]:
+    if isinstance(source, ColumnarRuns):
+        features, matrix = source.scalar_matrix()
+        return source.runs(), features, matrix
+    features, matrix = scalar_matrix(source)
+    return [run.index() for run in source], features, matrix
+
+
+def _index_keys(indices: List[dict]) -> List[str]:
+    keys = list(dict.fromkeys(key for index in indices for key in index))
+    for key in keys:
+        if key in _reserved:
+            raise ValueError(
+                f"Index key {key} clashes with the {_reserved} columns."
+            )
+    return keys
+
+
+# NOTE: codes are int32 positions into categories, -1 for a missing value.
+def _factorize(values: Sequence) -> tuple[np.ndarray, List]:
+    categories = dict()
+    codes = np.fromiter(
+        (
+            (
+                -1
+                if value is None
+                else categories.setdefault(value, len(categories))
+            )
+            for value in values
+        ),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, list(categories.keys())
+
+
+# NOTE: Rows are feature-major (every run of a feature, then the next
+# feature). That is the order of the columnar file on disk, so the value
+# column of a ColumnarRuns export is a view, not a copy.
+def _long_columns(
+    source: Union[Sequence[Run], ColumnarRuns], dropna: bool
+) -> dict:
+    indices, features, matrix = _scalar_data(source)
+    keys = _index_keys(indices)
+    num_runs, num_features = matrix.shape
+    values = np.ravel(matrix, order="F")
+    run_codes = np.tile(np.arange(num_runs, dtype=np.int32), num_features)
+    feature_codes = np.repeat(
+        np.arange(num_features, dtype=np.int32), num_runs
+    )
+    if dropna:
+        keep = ~np.isnan(values)
+        values = values[keep]
+        run_codes = run_codes[keep]
+        feature_codes = feature_codes[keep]
+
+    columns = dict()
+    for key in keys:
+        codes, categories = _factorize([index.get(key) for index in indices])
+        columns[key] = (codes[run_codes], categories)
+    for position, column in enumerate(["stat", "path"]):
+        codes, categories = _factorize(
+            [feature[position] for feature in features]
+        )
+        columns[column] = (codes[feature_codes], categories)
+    columns["value"] = values
+    return columns
+
+
+def to_pandas(
+    source: Union[Sequence[Run], ColumnarRuns],
+    layout: str = "long",
+    dropna: bool = True,
+) -> Any:
+    pd = _require("pandas", "Exporting to pandas")
+    if layout not in ["long", "wide"]:
+        raise ValueError("layout should be either long or wide.")
+    if layout == "wide":
+        indices, features, matrix = _scalar_data(source)
+        keys = _index_keys(indices)
+        index = pd.MultiIndex.from_arrays(
+            [[index.get(key) for index in indices] for key in keys],
+            names=keys,
+        )
+        columns = pd.MultiIndex.from_tuples(features, names=["stat", "path"])
+        return pd.DataFrame(matrix, index=index, columns=columns, copy=False)
+
+    columns = _long_columns(source, dropna)
+    return pd.DataFrame(
+        {
+            name: (
+                column
+                if name == "value"
+                else pd.Categorical.from_codes(column[0], column[1])
+            )
+            for name, column in columns.items()
+        },
+        copy=False,
+    )
+
+
+def to_arrow(
+    source: Union[Sequence[Run], ColumnarRuns], dropna: bool = True
+) -> Any:
+    pa = _require("pyarrow", "Exporting to Arrow")
+    columns = _long_columns(source, dropna)
+    arrays = dict()
+    for name, column in columns.items():
+        if name == "value":
+            arrays[name] = pa.array(column, type=pa.float64())
+            continue
+        codes, categories = column
+        arrays[name] = pa.DictionaryArray.from_arrays(
+            pa.array(codes, mask=codes < 0), pa.array(categories)
+        )
+    return pa.table(arrays)
+
+
+def _build_tree(paths: Sequence[str]) -> tuple[Node, dict[str, Node]]:
+    root = Node("root", "")
+    nodes = {"": root}
+    for path in paths:
+        parts = path.split(".")
+        for depth in range(1, len(parts) + 1):
+            prefix = ".".join(parts[:depth])
+            if prefix not in nodes:
+                node = Node(parts[depth - 1], prefix)
+                nodes[".".join(parts[: depth - 1])].add_child(node)
+                nodes[prefix] = node
+    return root, nodes
+
+
+def _to_python(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# NOTE: All runs share one node tree, like the stats of a ColumnarRuns
+# query do.
+def _runs_from_matrix(
+    keys: List[str],
+    run_values: List[tuple],
+    features: List[tuple[str, str]],
+    matrix: np.ndarray,
+) -> List[Run]:
+    root, nodes = _build_tree(sorted({path for _, path in features}))
+    by_stat = dict()
+    for column, (name, path) in enumerate(features):
+        by_stat.setdefault(name, []).append((column, nodes[path]))
+    runs = []
+    for row, values in enumerate(run_values):
+        index = {
+            key: _to_python(value)
+            for key, value in zip(keys, values)
+            if value is not None and value == value
+        }
+        row_values = matrix[row].tolist()
+        stats = dict()
+        for name, columns in by_stat.items():
+            value = {
+                parent: row_values[column]
+                for column, parent in columns
+                if row_values[column] == row_values[column]
+            }
+            if not value:
+                continue
+            stat = Scalar(index, name)
+            stat._set_value(value)
+            stat._set_parents(list(value.keys()))
+            stats[name] = stat
+        runs.append(Run(index, root, stats))
+    return runs
+
+
+def from_pandas(frame: Any) -> List[Run]:
+    pd = _require("pandas", "Importing from pandas")
+    if isinstance(frame.columns, pd.MultiIndex):
+        if list(frame.columns.names) != ["stat", "path"]:
+            raise ValueError(
+                "Wide frames should have (stat, path) columns, "
+                "as written by to_pandas(layout='wide')."
+            )
+        keys = [name for name in frame.index.names if name is not None]
+        run_values = [
+            values if isinstance(values, tuple) else (values,)
+            for values in frame.index.tolist()
+        ]
+        if not keys:
+            run_values = [() for _ in run_values]
+        return _runs_from_matrix(
+            keys,
+            run_values,
+            list(frame.columns),
+            frame.to_numpy(dtype=np.float64),
+        )
+
+    missing = [column for column in _reserved if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Long frames need the columns {missing}.")
+    keys = [column for column in frame.columns if column not in _reserved]
+    if keys:
+        run_codes, run_values = pd.MultiIndex.from_frame(
+            frame[keys]
+        ).factorize()
+        run_values = list(run_values)
+    else:
+        run_codes = np.zeros(len(frame), dtype=np.intp)
+        run_values = [()]
+    feature_codes, features = pd.MultiIndex.from_arrays(
+        [frame["stat"], frame["path"]]
+    ).factorize()
+    matrix = np.full((len(run_values), len(features)), np.nan)
+    matrix[run_codes, feature_codes] = frame["value"].to_numpy(
+        dtype=np.float64
+    )
+    return _runs_from_matrix(keys, run_values, list(features), matrix)
+
+
+def from_arrow(table: Any) -> List[Run]:
+    _require("pyarrow", "Importing from Arrow")
+    return from_pandas(table.to_pandas())
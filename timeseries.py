@@ -0,0 +1,338 @@
+from math import ceil
+from typing import Callable, Iterable, List, Optional, Set, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .aggregators import array_reducer
+from .base_types import AggregatorNode, Node, Stat
+from .json_interface import compile_json_stats
+from .stats import Scalar
+from .util import to_float
+
+_reducers = {
+    "sum": np.nansum,
+    "mean": np.nanmean,
+    "min": np.nanmin,
+    "max": np.nanmax,
+}
+
+# NOTE: (ufunc, fill) per reduction. nan is replaced by the fill value
+# before reduceat, so a bucket ignores its nan epochs like window() does.
+_reduceat = {
+    "sum": (np.add, 0.0),
+    "mean": (np.add, 0.0),
+    "min": (np.minimum, np.inf),
+    "max": (np.maximum, -np.inf),
+}
+
+
+class TimeSeries(Stat):
+    def __init__(
+        self,
+        index: dict,
+        name: str,
+        times: np.ndarray,
+        parents: List[Node],
+        data: np.ndarray,
+    ) -> None:
+        super().__init__(index, name, "TimeSeries")
+        times = np.asarray(times, dtype=np.float64)
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 2:
+            raise ValueError("data should be a 2D (epochs x parents) array.")
+        if data.shape != (len(times), len(parents)):
+            raise ValueError(
+                f"Shape of data {data.shape} does not match "
+                f"{len(times)} epochs and {len(parents)} parents."
+            )
+        self._times = times
+        self._data = data
+        self._parents = list(parents)
+        self._columns = {parent: i for i, parent in enumerate(self._parents)}
+
+    def times(self) -> np.ndarray:
+        return self._times
+
+    def data(self) -> np.ndarray:
+        return self._data
+
+    def num_epochs(self) -> int:
+        return len(self._times)
+
+    def column(self, parent: Node) -> np.ndarray:
+        return self._data[:, self._columns[parent]]
+
+    # NOTE: Every entry is a view into the underlying array, not a copy.
+    def value(self) -> dict:
+        return {parent: self.column(parent) for parent in self._parents}
+
+    def at(self, epoch: int) -> Scalar:
+        row = self._data[epoch]
+        to_ret = Scalar(self._index, self._name)
+        to_ret._set_value(
+            {parent: float(row[i]) for i, parent in enumerate(self._parents)}
+        )
+        to_ret._set_parents(list(self._parents))
+        return to_ret
+
+    def _derive(
+        self, name: str, times: np.ndarray, data: np.ndarray
+    ) -> "TimeSeries":
+        return TimeSeries(self._index, name, times, self._parents, data)
+
+    def deltas(self) -> "TimeSeries":
+        return self._derive(
+            f"delta({self._name})",
+            self._times[1:],
+            np.diff(self._data, axis=0),
+        )
+
+    def rates(self) -> "TimeSeries":
+        durations = np.diff(self._times)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data = np.diff(self._data, axis=0) / durations[:, np.newaxis]
+        return self._derive(f"rate({self._name})", self._times[1:], data)
+
+    def cumulative(self) -> "TimeSeries":
+        return self._derive(
+            f"cumsum({self._name})",
+            self._times,
+            np.nancumsum(self._data, axis=0),
+        )
+
+    def window(self, size: int, reduce: str = "mean") -> "TimeSeries":
+        if reduce not in _reducers:
+            raise ValueError(
+                f"reduce should be one of {list(_reducers.keys())}."
+            )
+        if not 0 < size <= self.num_epochs():
+            raise ValueError(
+                f"Window size should be in [1, {self.num_epochs()}]."
+            )
+        windows = sliding_window_view(self._data, size, axis=0)
+        return self._derive(
+            f"window_{reduce}({self._name}, {size})",
+            self._times[size - 1 :],
+            _reducers[reduce](windows, axis=-1),
+        )
+
+    def downsample(
+        self, max_points: int, reduce: str = "mean"
+    ) -> "TimeSeries":
+        if reduce not in _reducers:
+            raise ValueError(
+                f"reduce should be one of {list(_reducers.keys())}."
+            )
+        if max_points < 1:
+            raise ValueError("max_points should be at least 1.")
+        num_epochs = self.num_epochs()
+        if num_epochs <= max_points:
+            return self
+        step = ceil(num_epochs / max_points)
+        starts = np.arange(0, num_epochs, step)
+        ufunc, fill = _reduceat[reduce]
+        valid = ~np.isnan(self._data)
+        data = ufunc.reduceat(
+            np.where(valid, self._data, fill), starts, axis=0
+        )
+        counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        if reduce == "mean":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                data /= counts
+        elif reduce != "sum":
+            data[counts == 0] = np.nan
+        return self._derive(self._name, self._times[starts], data)
+
+    def filter_parents(
+        self, these_parents: Set[Node], not_these_parents: Set[Node]
+    ) -> "TimeSeries":
+        if these_parents and not_these_parents:
+            raise ValueError(
+                "Either these_parents or not_these_parents should be empty"
+            )
+
+        keep = [
+            i
+            for i, parent in enumerate(self._parents)
+            if (these_parents and parent in these_parents)
+            or (not_these_parents and parent not in not_these_parents)
+        ]
+        return TimeSeries(
+            self._index,
+            self._name,
+            self._times,
+            [self._parents[i] for i in keep],
+            self._data[:, keep],
+        )
+
+    def dropna(self) -> "TimeSeries":
+        keep = np.flatnonzero(~np.isnan(self._data).any(axis=0))
+        return TimeSeries(
+            self._index,
+            self._name,
+            self._times,
+            [self._parents[i] for i in keep],
+            self._data[:, keep],
+        )
+
+    def aggregate_using(self, aggregator: AggregatorNode) -> "TimeSeries":
+        reducer = array_reducer(type(aggregator))
+        if reducer is None:
+            raise RuntimeError(
+                f"{type(aggregator).__name__} can not aggregate a TimeSeries."
+            )
+        with np.errstate(all="ignore"):
+            aggregated = reducer(self._data, axis=1)
+        return TimeSeries(
+            self._index,
+            self._name,
+            self._times,
+            self._parents + [aggregator],
+            np.column_stack([self._data, aggregated]),
+        )
+
+    def _apply(
+        self,
+        other: Union["TimeSeries", int, float],
+        op: Callable[[np.ndarray, np.ndarray], np.ndarray],
+        symbol: str,
+    ) -> "TimeSeries":
+        if isinstance(other, Stat):
+            if not isinstance(other, TimeSeries):
+                raise ValueError(
+                    f"You can only use {symbol} between two TimeSeries."
+                )
+            if self._index != other.index():
+                raise ValueError(
+                    "Indices of the two TimeSeries are not the same."
+                )
+            if self._parents != other.parents():
+                raise ValueError(
+                    "Parents of the two TimeSeries are not the same."
+                )
+            if not np.array_equal(self._times, other.times()):
+                raise ValueError(
+                    "Epochs of the two TimeSeries are not the same."
+                )
+            other_data = other.data()
+            other_name = other.name()
+        elif isinstance(other, (int, float)):
+            other_data = other
+            other_name = other
+        else:
+            raise ValueError(
+                f"You can only use {symbol} with a TimeSeries or a number."
+            )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data = op(self._data, other_data)
+        return self._derive(
+            f"({self._name} {symbol} {other_name})", self._times, data
+        )
+
+    def __add__(self, other: Union["TimeSeries", int, float]) -> "TimeSeries":
+        return self._apply(other, np.add, "+")
+
+    def __sub__(self, other: Union["TimeSeries", int, float]) -> "TimeSeries":
+        return self._apply(other, np.subtract, "-")
+
+    def __mul__(self, other: Union["TimeSeries", int, float]) -> "TimeSeries":
+        return self._apply(other, np.multiply, "*")
+
+    def __truediv__(
+        self, other: Union["TimeSeries", int, float]
+    ) -> "TimeSeries":
+        return self._apply(other, np.true_divide, "/")
+
+    def __floordiv__(
+        self, other: Union["TimeSeries", int, float]
+    ) -> "TimeSeries":
+        return self._apply(other, np.floor_divide, "//")
+
+    def __pow__(self, other: Union["TimeSeries", int, float]) -> "TimeSeries":
+        return self._apply(other, np.power, "**")
+
+    def __mod__(self, other: Union["TimeSeries", int, float]) -> "TimeSeries":
+        return self._apply(other, np.mod, "%")
+
+    def __str__(self) -> str:
+        return (
+            f"{self._type}(name: {self._name}, epochs: {self.num_epochs()}, "
+            f"parents: {self._parents})"
+        )
+
+
+# NOTE: Mirrors the traversal in compile_json_stats but only collects
+# Scalar values keyed by node path so that no Node or Stat objects are
+# created per epoch.
+def _collect_scalars(to_compile: dict, path: str, current: dict) -> dict:
+    for key, value in to_compile.items():
+        if "." in key or not isinstance(value, dict):
+            continue
+        stat_type = value.get("type", "otherwise")
+        if stat_type == "SimObject":
+            _collect_scalars(
+                value, ".".join([path, value["name"]]).lstrip("."), current
+            )
+        elif stat_type == "SimObjectVector":
+            for item in value["value"]:
+                _collect_scalars(
+                    item, ".".join([path, item["name"]]).lstrip("."), current
+                )
+        elif stat_type == "Scalar":
+            current.setdefault(key, dict())[path] = to_float(value["value"])
+    return current
+
+
+def _nodes_by_path(root: Node) -> dict:
+    ret = {root.path(): root}
+    for child in root.children():
+        ret.update(_nodes_by_path(child))
+    return ret
+
+
+def compile_time_series(
+    index: dict,
+    dumps: Iterable[dict],
+    root: Node,
+    times: Optional[List[float]] = None,
+    time_key: str = "finalTick",
+) -> dict:
+    dumps = list(dumps)
+    if not dumps:
+        raise ValueError("At least one stats dump is required.")
+    if times is not None and len(times) != len(dumps):
+        raise ValueError("times should have one entry per dump.")
+
+    # NOTE: The node tree is built once from the first dump.
+    compile_json_stats(index, dumps[0], dict(), root)
+    nodes = _nodes_by_path(root)
+
+    collected = [_collect_scalars(dump, root.path(), dict()) for dump in dumps]
+    if times is None:
+        if all(time_key in dump for dump in dumps):
+            times = [to_float(dump[time_key]["value"]) for dump in dumps]
+        else:
+            times = list(range(len(dumps)))
+
+    # NOTE: Keep the first-seen order of stats and parents across epochs.
+    layout = dict()
+    for epoch in collected:
+        for key, values in epoch.items():
+            paths = layout.setdefault(key, dict())
+            for path in values:
+                paths.setdefault(path, None)
+
+    ret = dict()
+    for key, paths in layout.items():
+        paths = [path for path in paths if path in nodes]
+        columns = {path: i for i, path in enumerate(paths)}
+        data = np.full((len(dumps), len(paths)), np.nan)
+        for row, epoch in enumerate(collected):
+            for path, value in epoch.get(key, dict()).items():
+                if path in columns:
+                    data[row, columns[path]] = value
+        ret[key] = TimeSeries(
+            index, key, times, [nodes[path] for path in paths], data
+        )
+    return ret
@@ -1,5 +1,20 @@
+from math import sqrt
 from typing import List
 
 
 def map_values_to_id(values: List) -> dict[str, int]:
     return {value: idx for idx, value in enumerate(values)}
+
+
+def get_good_dimensions(one_d: int) -> tuple[int, int]:
+    side = int(sqrt(one_d))
+    while one_d % side != 0:
+        side -= 1
+    return max(side, one_d // side), min(side, one_d // side)
+
+
+def to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
@@ -0,0 +1,314 @@
+import json
+import os
+import sqlite3
+from array import array
+from threading import RLock
+from typing import Any, Iterable, List, Optional, Union
+from warnings import warn
+
+from .base_types import Node, Stat
+from .run import Run
+from .stats import Distribution, Scalar
+
+_schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    run_index TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS run_keys (
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (key, value, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS run_keys_by_run ON run_keys (run_id);
+CREATE TABLE IF NOT EXISTS stat_names (
+    stat_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    node_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scalars (
+    stat_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    node_id INTEGER NOT NULL,
+    value,
+    PRIMARY KEY (stat_id, run_id, node_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scalars_by_node ON scalars (node_id, stat_id);
+CREATE INDEX IF NOT EXISTS scalars_by_run ON scalars (run_id);
+CREATE TABLE IF NOT EXISTS distributions (
+    stat_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    node_id INTEGER NOT NULL,
+    min REAL NOT NULL,
+    bin_size REAL NOT NULL,
+    counts BLOB NOT NULL,
+    PRIMARY KEY (stat_id, run_id, node_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS distributions_by_node
+    ON distributions (node_id, stat_id);
+CREATE INDEX IF NOT EXISTS distributions_by_run ON distributions (run_id);
+"""
+
+
+def _encode_index(index: dict) -> str:
+    return json.dumps(index, sort_keys=True)
+
+
+def _encode_value(value: Any) -> str:
+    return json.dumps(value)
+
+
+class StatWarehouse:
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        # NOTE: The connection is shared between threads (e.g. a
+        # StatsWatcher polling in the background), _lock serializes its use.
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = RLock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_schema)
+        self._nodes = dict()
+        self._load_catalog()
+
+    def _load_catalog(self) -> None:
+        self._stat_ids = {
+            name: (stat_id, stat_type)
+            for stat_id, name, stat_type in self._connection.execute(
+                "SELECT stat_id, name, type FROM stat_names"
+            )
+        }
+        self._node_ids = {
+            path: node_id
+            for node_id, path in self._connection.execute(
+                "SELECT node_id, path FROM nodes"
+            )
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "StatWarehouse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _stat_id(self, name: str, stat_type: str) -> int:
+        if name not in self._stat_ids:
+            cursor = self._connection.execute(
+                "INSERT INTO stat_names (name, type) VALUES (?, ?)",
+                (name, stat_type),
+            )
+            self._stat_ids[name] = (cursor.lastrowid, stat_type)
+        stat_id, known_type = self._stat_ids[name]
+        if known_type != stat_type:
+            raise ValueError(
+                f"Stat {name} was ingested as a {known_type} before, "
+                f"can not ingest it as a {stat_type}."
+            )
+        return stat_id
+
+    def _node_id(self, node: Node) -> int:
+        path = node.path()
+        if path not in self._node_ids:
+            cursor = self._connection.execute(
+                "INSERT INTO nodes (path, name) VALUES (?, ?)",
+                (path, node.name()),
+            )
+            self._node_ids[path] = cursor.lastrowid
+        return self._node_ids[path]
+
+    def _node(self, path: str, name: str) -> Node:
+        if path not in self._nodes:
+            self._nodes[path] = Node(name, path)
+        return self._nodes[path]
+
+    def _run_id(self, index: dict) -> int:
+        encoded = _encode_index(index)
+        row = self._connection.execute(
+            "SELECT run_id FROM runs WHERE run_index = ?", (encoded,)
+        ).fetchone()
+        if row is not None:
+            # NOTE: Re-ingesting a run replaces its previous stats.
+            for table in ["scalars", "distributions", "run_keys"]:
+                self._connection.execute(
+                    f"DELETE FROM {table} WHERE run_id = ?", row
+                )
+            run_id = row[0]
+        else:
+            run_id = self._connection.execute(
+                "INSERT INTO runs (run_index) VALUES (?)", (encoded,)
+            ).lastrowid
+        self._connection.executemany(
+            "INSERT INTO run_keys (key, value, run_id) VALUES (?, ?, ?)",
+            [
+                (key, _encode_value(value), run_id)
+                for key, value in index.items()
+            ],
+        )
+        return run_id
+
+    def ingest(self, runs: Iterable[Run]) -> int:
+        with self._lock:
+            try:
+                with self._connection:
+                    return self._ingest(runs)
+            except BaseException:
+                # NOTE: The transaction was rolled back, so are the ids that
+                # were cached while it was open.
+                self._load_catalog()
+                raise
+
+    def _ingest(self, runs: Iterable[Run]) -> int:
+        num_runs = 0
+        for run in runs:
+            run_id = self._run_id(run.index())
+            scalar_rows = []
+            distribution_rows = []
+            for name, stat in run.stats().items():
+                if isinstance(stat, Scalar):
+                    stat_id = self._stat_id(name, "Scalar")
+                    scalar_rows.extend(
+                        (stat_id, run_id, self._node_id(parent), value)
+                        for parent, value in stat.value().items()
+                    )
+                elif isinstance(stat, Distribution):
+                    stat_id = self._stat_id(name, "Distribution")
+                    for parent, buckets in stat.value().items():
+                        if not buckets:
+                            continue
+                        counts = array("d", (b.freq() for b in buckets))
+                        distribution_rows.append(
+                            (
+                                stat_id,
+                                run_id,
+                                self._node_id(parent),
+                                buckets[0].lower_bound(),
+                                buckets[0].size(),
+                                counts.tobytes(),
+                            )
+                        )
+                else:
+                    warn(f"Skipping {name} with type {type(stat)}")
+            self._connection.executemany(
+                "INSERT INTO scalars VALUES (?, ?, ?, ?)", scalar_rows
+            )
+            self._connection.executemany(
+                "INSERT INTO distributions VALUES (?, ?, ?, ?, ?, ?)",
+                distribution_rows,
+            )
+            num_runs += 1
+        return num_runs
+
+    def _run_filter(
+        self, where: Optional[dict], column: str = "run_id"
+    ) -> tuple[str, list]:
+        clauses = []
+        params = []
+        for key, values in (where or dict()).items():
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            values = [_encode_value(value) for value in values]
+            clauses.append(
+                f"{column} IN (SELECT run_id FROM run_keys WHERE key = ? "
+                f"AND value IN ({', '.join('?' * len(values))}))"
+            )
+            params += [key] + values
+        return " AND ".join(clauses), params
+
+    def runs(self, where: Optional[dict] = None) -> List[dict]:
+        clause, params = self._run_filter(where)
+        query = "SELECT run_index FROM runs"
+        if clause:
+            query += f" WHERE {clause}"
+        with self._lock:
+            return [
+                json.loads(row[0])
+                for row in self._connection.execute(
+                    query + " ORDER BY run_id", params
+                )
+            ]
+
+    def stat_names(self) -> List[str]:
+        with self._lock:
+            return list(self._stat_ids.keys())
+
+    def query(
+        self,
+        stat_name: str,
+        where: Optional[dict] = None,
+        path: Optional[str] = None,
+    ) -> List[Stat]:
+        with self._lock:
+            if stat_name not in self._stat_ids:
+                raise ValueError(
+                    f"No stat named {stat_name} in the warehouse."
+                )
+            stat_id, stat_type = self._stat_ids[stat_name]
+        table = "scalars" if stat_type == "Scalar" else "distributions"
+        columns = (
+            "s.value"
+            if stat_type == "Scalar"
+            else "s.min, s.bin_size, s.counts"
+        )
+
+        clauses = ["s.stat_id = ?"]
+        params = [stat_id]
+        run_clause, run_params = self._run_filter(where, "s.run_id")
+        if run_clause:
+            clauses.append(run_clause)
+            params += run_params
+        if path is not None:
+            # NOTE: path is a GLOB pattern, e.g. "system.cpu*".
+            clauses.append("n.path GLOB ?")
+            params.append(path)
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT r.run_id, r.run_index, n.path, n.name, {columns} "
+                f"FROM {table} AS s "
+                "JOIN runs AS r ON r.run_id = s.run_id "
+                "JOIN nodes AS n ON n.node_id = s.node_id "
+                f"WHERE {' AND '.join(clauses)} "
+                "ORDER BY s.run_id, s.node_id",
+                params,
+            )
+
+            ret = []
+            current_run = None
+            for run_id, run_index, node_path, node_name, *value in rows:
+                if run_id != current_run:
+                    current_run = run_id
+                    index = json.loads(run_index)
+                    stat = (
+                        Scalar(index, stat_name)
+                        if stat_type == "Scalar"
+                        else Distribution(index, stat_name)
+                    )
+                    ret.append(stat)
+                parent = self._node(node_path, node_name)
+                if stat_type == "Scalar":
+                    stat.value()[parent] = (
+                        float("nan") if value[0] is None else value[0]
+                    )
+                else:
+                    min_val, bin_size, blob = value
+                    counts = array("d")
+                    counts.frombytes(blob)
+                    stat.value()[parent] = [
+                        Distribution.Bucket(
+                            min_val + i * bin_size,
+                            min_val + (i + 1) * bin_size,
+                            freq,
+                        )
+                        for i, freq in enumerate(counts)
+                    ]
+                stat.parents().append(parent)
+            return ret
@@ -0,0 +1,257 @@
+import json
+import os
+from pathlib import Path
+from threading import Event, Lock, RLock, Thread
+from time import time
+from typing import Callable, List, Optional, Sequence, Union
+from warnings import warn
+
+from .base_types import AggregatorNode, Stat
+from .daemon import StatService
+from .loaders import load_json_stats
+from .registry import RunRegistry
+from .run import Run
+from .warehouse import StatWarehouse
+
+PathLike = Union[str, os.PathLike]
+
+
+# NOTE: Picks up directories named like key=value, e.g.
+# results/cpu=o3/l2=1MB/stats.json -> {"cpu": "o3", "l2": "1MB"}.
+def index_from_path(path: PathLike) -> dict:
+    index = dict()
+    for part in Path(path).parent.parts:
+        key, sep, value = part.partition("=")
+        if sep:
+            index[key] = value
+    return index
+
+
+class StatsWatcher:
+    def __init__(
+        self,
+        root: PathLike,
+        pattern: str = "**/stats.json",
+        index_from: Callable[[Path], dict] = index_from_path,
+        sidecar: Optional[str] = "index.json",
+        settle: float = 2.0,
+        registry: Optional[Union[RunRegistry, StatService]] = None,
+        warehouse: Optional[StatWarehouse] = None,
+        state_path: Optional[PathLike] = None,
+    ) -> None:
+        if state_path is not None and warehouse is None:
+            raise ValueError(
+                "state_path needs a warehouse, it only keeps the warehouse "
+                "from ingesting the same file twice across restarts."
+            )
+        self._root = Path(root)
+        self._pattern = pattern
+        self._index_from = index_from
+        self._sidecar = sidecar
+        self._settle = settle
+        self._registry = RunRegistry() if registry is None else registry
+        self._warehouse = warehouse
+        self._state_path = state_path
+        # NOTE: path -> (mtime_ns, size) of the version that was ingested
+        # (or failed), so every version of a file is read exactly once. With
+        # state_path the versions seen before a restart are in _restored,
+        # they are loaded into the registry again but not into the
+        # warehouse, which already has them.
+        self._seen = dict()
+        self._restored = dict()
+        self._run_ids = dict()
+        self._errors = dict()
+        self._aggregates = dict()
+        self._lock = RLock()
+        # NOTE: Held for a whole poll, so a background poll and a poll() call
+        # never ingest the same file twice.
+        self._poll_lock = Lock()
+        self._stop = Event()
+        self._thread = None
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                self._restored = {
+                    path: tuple(signature)
+                    for path, signature in json.load(f).items()
+                }
+
+    def registry(self) -> Union[RunRegistry, StatService]:
+        return self._registry
+
+    def runs(self) -> List[Run]:
+        with self._lock:
+            return self._registry.runs()
+
+    def errors(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._errors)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._seen),
+                "runs": len(self._registry),
+                "errors": len(self._errors),
+            }
+
+    def _index_for(self, path: Path) -> dict:
+        if self._sidecar is not None:
+            sidecar = path.parent / self._sidecar
+            if sidecar.exists():
+                with open(sidecar) as f:
+                    return json.load(f)
+        return self._index_from(path)
+
+    # NOTE: aggregate(run) is evaluated once for every run that matches
+    # where, and again only if the run's file changes.
+    def register(
+        self,
+        name: str,
+        aggregate: Callable[[Run], Stat],
+        where: Optional[dict] = None,
+        requires: Sequence[str] = (),
+    ) -> None:
+        with self._lock:
+            self._aggregates[name] = (
+                aggregate,
+                where or dict(),
+                list(requires),
+                dict(),
+                dict(),
+            )
+            for run_id, run in enumerate(self._registry.runs()):
+                self._update_aggregate(name, run_id, run)
+
+    def register_aggregate(
+        self,
+        name: str,
+        stat_name: str,
+        aggregator: AggregatorNode,
+        where: Optional[dict] = None,
+    ) -> None:
+        self.register(
+            name,
+            lambda run: run.stat(stat_name).aggregate_using(aggregator),
+            where,
+            [stat_name],
+        )
+
+    def _matches(self, run: Run, where: dict, requires: List[str]) -> bool:
+        if not all(stat_name in run for stat_name in requires):
+            return False
+        for key, values in where.items():
+            if not isinstance(values, (list, tuple, set, frozenset)):
+                values = [values]
+            if run.index().get(key, None) not in values:
+                return False
+        return True
+
+    # NOTE: A failing aggregate is recorded for that aggregate and run only,
+    # the run itself is still ingested.
+    def _update_aggregate(self, name: str, run_id: int, run: Run) -> None:
+        aggregate, where, requires, results, errors = self._aggregates[name]
+        results.pop(run_id, None)
+        errors.pop(run_id, None)
+        if not self._matches(run, where, requires):
+            return
+        try:
+            results[run_id] = aggregate(run)
+        except Exception as error:
+            warn(f"Could not evaluate {name} for {run.index()}: {error}")
+            errors[run_id] = f"{type(error).__name__}: {error}"
+
+    def aggregate(self, name: str) -> List[Stat]:
+        with self._lock:
+            results = self._aggregates[name][3]
+            return [results[run_id] for run_id in sorted(results)]
+
+    def aggregate_errors(self, name: str) -> List[tuple[dict, str]]:
+        with self._lock:
+            errors = self._aggregates[name][4]
+            runs = self._registry.runs()
+            return [
+                (runs[run_id].index(), errors[run_id])
+                for run_id in sorted(errors)
+            ]
+
+    def _ingest(self, path: Path, to_warehouse: bool = True) -> Run:
+        run = load_json_stats(path, self._index_for(path))
+        with self._lock:
+            key = str(path)
+            if key in self._run_ids:
+                run_id = self._run_ids[key]
+                self._registry.replace(run_id, run)
+            else:
+                run_id = self._registry.add(run)
+                self._run_ids[key] = run_id
+            if self._warehouse is not None and to_warehouse:
+                self._warehouse.ingest([run])
+            for name in self._aggregates:
+                self._update_aggregate(name, run_id, run)
+        return run
+
+    def poll(self) -> List[Run]:
+        with self._poll_lock:
+            return self._poll()
+
+    def _poll(self) -> List[Run]:
+        now = time()
+        ingested = []
+        changed = False
+        for path in sorted(self._root.glob(self._pattern)):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            # NOTE: Files still being written are left for a later poll.
+            if self._seen.get(str(path), None) == signature:
+                continue
+            if now - stat.st_mtime < self._settle:
+                continue
+            restored = self._restored.pop(str(path), None) == signature
+            try:
+                ingested.append(self._ingest(path, not restored))
+                with self._lock:
+                    self._errors.pop(str(path), None)
+            except Exception as error:
+                warn(f"Could not ingest {path}: {error}")
+                with self._lock:
+                    self._errors[str(path)] = (
+                        f"{type(error).__name__}: {error}"
+                    )
+            with self._lock:
+                self._seen[str(path)] = signature
+            changed = True
+        if changed and self._state_path is not None:
+            self._save_state()
+        return ingested
+
+    def _save_state(self) -> None:
+        with self._lock:
+            state = dict(self._restored)
+            state.update(self._seen)
+        tmp_path = f"{self._state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path)
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(interval)
+
+    def start(self, interval: float = 5.0) -> "StatsWatcher":
+        if self._thread is not None:
+            raise RuntimeError("This watcher is already running.")
+        self._stop.clear()
+        self._thread = Thread(target=self._loop, args=(interval,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None